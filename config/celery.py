@@ -1,6 +1,7 @@
 
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_ready
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -19,3 +20,21 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+# Prometheus exporter for worker processes. Prefork children write samples to
+# PROMETHEUS_MULTIPROC_DIR; the main worker process serves the aggregate.
+@worker_ready.connect
+def start_metrics_exporter(**kwargs):
+    port = os.environ.get('CELERY_METRICS_PORT')
+    if port:
+        from prometheus_client import start_http_server
+        from content.metrics import get_registry
+        start_http_server(int(port), registry=get_registry())
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
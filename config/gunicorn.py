@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration.
+
+Only hooks live here; bind address and worker count stay on the command line
+so Railway's PORT handling is unchanged.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the Prometheus multiprocess dir
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
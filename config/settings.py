@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -53,14 +54,17 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'content.metrics.MetricsMiddleware',  # Outermost so latency covers the whole stack
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files in production
+    'content.aio.AsyncWhiteNoiseMiddleware',  # WhiteNoise static files; async-capable for ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'content.db_router.ReplicaRoutingMiddleware',  # Before anything that reads the DB
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'content.profiling.RequestProfilingMiddleware',  # No-op unless REQUEST_PROFILING_ENABLED
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -88,6 +92,16 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Persistent connections are per thread. Under ASGI (ASYNC_API_VIEWS) queries
+# run on executor threads that Django does not close connections for, so
+# persistent connections would accumulate until Postgres runs out; they are
+# closed after each request instead. To avoid paying for a new connection
+# per request there, point DATABASE_URL at a pooler such as pgbouncer
+# (transaction mode also needs DISABLE_SERVER_SIDE_CURSORS for the export).
+DATABASE_CONN_MAX_AGE = int(os.environ.get(
+    'DATABASE_CONN_MAX_AGE', 0 if int(os.environ.get('ASYNC_API_VIEWS', 0)) else 600
+))
+
 # Railway provides DATABASE_URL automatically when you provision PostgreSQL
 # Priority: DATABASE_URL (Railway) > Individual SQL_* vars (Docker) > SQLite (local dev)
 if os.environ.get("DATABASE_URL"):
@@ -96,7 +110,7 @@ if os.environ.get("DATABASE_URL"):
     DATABASES = {
         'default': dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
+            conn_max_age=DATABASE_CONN_MAX_AGE,
             ssl_require=True
         )
     }
@@ -110,6 +124,7 @@ elif os.environ.get("SQL_DATABASE"):
             'PASSWORD': os.environ.get('SQL_PASSWORD'),
             'HOST': os.environ.get('SQL_HOST'),
             'PORT': os.environ.get('SQL_PORT'),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
         }
     }
 else:
@@ -122,6 +137,25 @@ else:
     }
 
 
+# Read replicas
+# Comma-separated database URLs, e.g. DATABASE_REPLICA_URLS=postgres://...@replica1/db,postgres://...@replica2/db
+# Reads of GET/HEAD requests are routed to a random replica (see
+# content.db_router); writes, Celery tasks and commands use 'default'. Users
+# who just wrote read from the primary for REPLICA_STICKY_SECONDS.
+# Replicas mirror 'default' in tests, so the suite runs against two local
+# databases, e.g. DATABASE_REPLICA_URLS=sqlite:///db.sqlite3
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()):
+    import dj_database_url
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(replica_url, conn_max_age=DATABASE_CONN_MAX_AGE)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['content.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -176,6 +210,13 @@ AUTH_USER_MODEL = 'content.User'
 REDIS_URL = os.environ.get('REDIS_URL', os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+# Application Redis (content.redis_client: rate limits, author trust, replica
+# stickiness). Each command waits at most REDIS_SOCKET_TIMEOUT seconds; after
+# a connection error or timeout the client fails fast for
+# REDIS_DOWN_BACKOFF_SECONDS, so an unreachable Redis costs a request path
+# at most one timeout per process per backoff window, not one per call.
+REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 0.5))
+REDIS_DOWN_BACKOFF_SECONDS = float(os.environ.get('REDIS_DOWN_BACKOFF_SECONDS', 5))
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -198,6 +239,147 @@ GOOGLE_SERVICE_ACCOUNT_JSON = os.environ.get(
 # Option 3: API Key (deprecated, will fail for moderateText endpoint)
 GOOGLE_CLOUD_API = os.getenv('GOOGLE_CLOUD_API')
 
+# Local pre-filter (content.prefilter)
+# Comments scoring below the trained model's threshold are approved without
+# calling the Google API; train with `python manage.py train_prefilter`
+PREFILTER_ENABLED = bool(int(os.environ.get('PREFILTER_ENABLED', 0)))
+PREFILTER_MODEL_PATH = os.environ.get('PREFILTER_MODEL_PATH', os.path.join(BASE_DIR, 'models', 'prefilter.npz'))
+
+# Near-duplicate spam detection (content.nearduplicate)
+# SimHash signatures of flagged / rejected comments are kept for
+# NEAR_DUPLICATE_TTL seconds; new comments within NEAR_DUPLICATE_MAX_DISTANCE
+# bits of one are flagged without an API call. Distances up to 3 are always
+# found by the 4-band index. Backend: 'redis' (shared) or 'memory' (per process)
+NEAR_DUPLICATE_ENABLED = bool(int(os.environ.get('NEAR_DUPLICATE_ENABLED', 1)))
+NEAR_DUPLICATE_BACKEND = os.environ.get('NEAR_DUPLICATE_BACKEND', 'redis')
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', 3))
+NEAR_DUPLICATE_TTL = int(os.environ.get('NEAR_DUPLICATE_TTL', 24 * 60 * 60))  # seconds
+NEAR_DUPLICATE_MIN_TOKENS = int(os.environ.get('NEAR_DUPLICATE_MIN_TOKENS', 5))
+
+# Moderation task retry policy
+# Transient Google API errors (timeouts, 429, 5xx) are retried with exponential
+# backoff and full jitter before falling back to keyword moderation
+MODERATION_MAX_RETRIES = int(os.environ.get('MODERATION_MAX_RETRIES', 3))
+MODERATION_RETRY_BACKOFF = float(os.environ.get('MODERATION_RETRY_BACKOFF', 2))  # seconds
+MODERATION_RETRY_BACKOFF_MAX = float(os.environ.get('MODERATION_RETRY_BACKOFF_MAX', 60))  # seconds
+# A MODERATING claim older than this is considered abandoned by a crashed worker
+MODERATION_CLAIM_TIMEOUT = int(os.environ.get('MODERATION_CLAIM_TIMEOUT', 300))  # seconds
+
+# Stuck-comment sweeper (content.tasks.sweep_stuck_comments_task, run by
+# Celery beat). Comments UNDER_REVIEW for longer than STUCK_COMMENT_AGE, or
+# with a MODERATING claim older than MODERATION_CLAIM_TIMEOUT, are
+# re-enqueued on MODERATION_BACKFILL_QUEUE, at most STUCK_COMMENT_BATCH_SIZE
+# per sweep and once per STUCK_COMMENT_REQUEUE_INTERVAL per comment. A lost
+# task is therefore retried within roughly STUCK_COMMENT_AGE +
+# STUCK_COMMENT_SWEEP_INTERVAL while the backlog fits in one batch.
+STUCK_COMMENT_AGE = int(os.environ.get('STUCK_COMMENT_AGE', 600))  # seconds
+STUCK_COMMENT_SWEEP_INTERVAL = int(os.environ.get('STUCK_COMMENT_SWEEP_INTERVAL', 60))  # seconds
+STUCK_COMMENT_BATCH_SIZE = int(os.environ.get('STUCK_COMMENT_BATCH_SIZE', 500))
+STUCK_COMMENT_REQUEUE_INTERVAL = int(os.environ.get('STUCK_COMMENT_REQUEUE_INTERVAL', 900))  # seconds
+MODERATION_BACKFILL_QUEUE = os.environ.get('MODERATION_BACKFILL_QUEUE', 'moderation-backfill')
+# The sweeper also publishes outbox rows older than this, as a safety net for
+# a missing or stalled relay_outbox process
+OUTBOX_STALE_AGE = int(os.environ.get('OUTBOX_STALE_AGE', 120))  # seconds
+
+CELERY_BEAT_SCHEDULE = {
+    'sweep-stuck-comments': {
+        'task': 'content.tasks.sweep_stuck_comments_task',
+        'schedule': STUCK_COMMENT_SWEEP_INTERVAL,
+        'options': {'expires': STUCK_COMMENT_SWEEP_INTERVAL},
+    },
+}
+
+# Flag policy: a comment is flagged when any moderation category's confidence
+# is above its threshold. JSON object of category name -> threshold, with
+# 'default' for unlisted categories, e.g. {"default": 0.6, "Health": 0.9}
+MODERATION_POLICY = json.loads(os.environ.get('MODERATION_POLICY', '{"default": 0.6}'))
+
+# Long comments are split at sentence boundaries into chunks of at most
+# MODERATION_CHUNK_CHARS characters and moderated concurrently
+MODERATION_CHUNK_CHARS = int(os.environ.get('MODERATION_CHUNK_CHARS', 4000))
+MODERATION_CHUNK_CONCURRENCY = int(os.environ.get('MODERATION_CHUNK_CONCURRENCY', 4))
+
+# Prometheus scrape endpoint (/metrics) access. With METRICS_TOKEN set,
+# scrapers must send `Authorization: Bearer <token>`; otherwise only
+# REMOTE_ADDR inside METRICS_ALLOWED_NETWORKS (comma-separated CIDRs) is
+# served. Keep the default loopback-only list behind a reverse proxy, whose
+# own private address would otherwise let public requests through.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_NETWORKS = [
+    network.strip()
+    for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128').split(',')
+    if network.strip()
+]
+
+# Cache-Control for post and comment reads that carry ETag / Last-Modified.
+# 'no-cache' lets clients store responses but revalidate every time (cheap
+# 304s). Behind a proxy that enforces authentication, something like
+# 'public, s-maxage=5, must-revalidate' lets it serve repeat reads itself.
+CONDITIONAL_GET_CACHE_CONTROL = os.environ.get('CONDITIONAL_GET_CACHE_CONTROL', 'private, no-cache')
+
+# Async serving (config.asgi with a uvicorn worker, see Dockerfile)
+# ASYNC_API_VIEWS routes the post, comment and notification reads to the
+# async views in content.async_views; leave it off under WSGI, where every
+# async view would pay for its own event loop. Sync calls made from async
+# middleware run on a pool of ASYNC_SYNC_POOL_SIZE threads per process.
+ASYNC_API_VIEWS = bool(int(os.environ.get('ASYNC_API_VIEWS', 0)))
+ASYNC_SYNC_POOL_SIZE = int(os.environ.get('ASYNC_SYNC_POOL_SIZE', 8))
+
+# Author trust (content.trust)
+# Comments by authors with a long clean history are approved on submit and
+# AUTHOR_TRUST_SAMPLE_RATE of them are moderated afterwards; a flag or
+# rejection suspends the fast path for AUTHOR_TRUST_REVOKE_SECONDS
+AUTHOR_TRUST_ENABLED = bool(int(os.environ.get('AUTHOR_TRUST_ENABLED', 1)))
+AUTHOR_TRUST_MIN_APPROVED = int(os.environ.get('AUTHOR_TRUST_MIN_APPROVED', 20))
+AUTHOR_TRUST_THRESHOLD = float(os.environ.get('AUTHOR_TRUST_THRESHOLD', 0.95))
+AUTHOR_TRUST_SAMPLE_RATE = float(os.environ.get('AUTHOR_TRUST_SAMPLE_RATE', 0.1))
+AUTHOR_TRUST_CACHE_SECONDS = int(os.environ.get('AUTHOR_TRUST_CACHE_SECONDS', 3600))
+AUTHOR_TRUST_REVOKE_SECONDS = int(os.environ.get('AUTHOR_TRUST_REVOKE_SECONDS', 30 * 24 * 3600))
+
+# Feed endpoint: latest approved comments shown per post (?comments=K)
+FEED_COMMENT_PREVIEWS = int(os.environ.get('FEED_COMMENT_PREVIEWS', 3))
+FEED_COMMENT_PREVIEWS_MAX = int(os.environ.get('FEED_COMMENT_PREVIEWS_MAX', 10))
+
+# Rate limiting (content.ratelimit)
+# Sliding windows per endpoint and scope as "requests/seconds". Scopes:
+# 'user' (JWT user id), 'ip' (client address), 'username' (the login name
+# being tried) and 'username_ip' (login name per client address). Login
+# keeps the tight window per (username, ip), so a third party cannot lock an
+# account's owner out, and a loose per-username one against guessing spread
+# over many addresses. Load tests should run with RATE_LIMIT_ENABLED=0.
+# Enable RATE_LIMIT_TRUST_X_FORWARDED_FOR only behind a proxy that sets the
+# header, otherwise clients can pick their own IP.
+RATE_LIMIT_ENABLED = bool(int(os.environ.get('RATE_LIMIT_ENABLED', 1)))
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = bool(int(os.environ.get('RATE_LIMIT_TRUST_X_FORWARDED_FOR', 0)))
+RATE_LIMITS = json.loads(os.environ.get('RATE_LIMITS') or json.dumps({
+    'submit_comment': {'user': '10/60', 'ip': '30/60'},
+    'login': {'ip': '20/60', 'username_ip': '5/60', 'username': '50/3600'},
+}))
+
+# Request profiling (content.profiling.RequestProfilingMiddleware)
+# Adds Server-Timing headers and logs slow requests; admins can send
+# `X-Profile: 1` to capture a cProfile dump of a single request
+REQUEST_PROFILING_ENABLED = bool(int(os.environ.get('REQUEST_PROFILING_ENABLED', 0)))
+REQUEST_SLOW_THRESHOLD_MS = float(os.environ.get('REQUEST_SLOW_THRESHOLD_MS', 500))
+REQUEST_PROFILE_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILE_SAMPLE_RATE', 0))
+REQUEST_PROFILE_DIR = os.environ.get('REQUEST_PROFILE_DIR', os.path.join(BASE_DIR, 'logs', 'profiles'))
+
+# Tracing (content.tracing)
+# Spans from submit_comment through moderate_comment_task are exported as
+# OTLP/JSON: 'none' disables tracing, 'file' appends to TRACING_EXPORT_FILE,
+# 'otlp' POSTs to an OTLP/HTTP collector
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none')
+TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME', 'moderation-microservice')
+TRACING_EXPORT_FILE = os.environ.get('TRACING_EXPORT_FILE', os.path.join(BASE_DIR, 'logs', 'traces.jsonl'))
+TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACING_OTLP_TIMEOUT = float(os.environ.get('TRACING_OTLP_TIMEOUT', 2))
+# Spans are exported in the background: up to TRACING_EXPORT_BATCH_SIZE spans
+# per request to the collector, at least every TRACING_EXPORT_INTERVAL seconds.
+# Spans beyond TRACING_EXPORT_QUEUE_SIZE pending are dropped, not waited on
+TRACING_EXPORT_QUEUE_SIZE = int(os.environ.get('TRACING_EXPORT_QUEUE_SIZE', 2048))
+TRACING_EXPORT_BATCH_SIZE = int(os.environ.get('TRACING_EXPORT_BATCH_SIZE', 512))
+TRACING_EXPORT_INTERVAL = float(os.environ.get('TRACING_EXPORT_INTERVAL', 1.0))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -1,9 +1,11 @@
 
 from django.contrib import admin
 from django.urls import path, include
+from content.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('content.urls_api')),
     path('', include('content.urls_ui')),
 ]
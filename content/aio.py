@@ -0,0 +1,116 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+import asyncio
+import functools
+import threading
+
+# Support for the async views served under ASGI (content.async_views).
+#
+# Sync calls made from async code (WhiteNoise's file lookup and serving, and
+# ReplicaRoutingMiddleware's stickiness lookups in Redis) run on one bounded
+# pool per process, so a burst of slow calls queues up instead of spawning a
+# thread per request. Views that are still sync DRF views (login, comment
+# submission, admin) are not on this pool; Django runs them through its own
+# sync_to_async adapter.
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def sync_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_SYNC_POOL_SIZE,
+                    thread_name_prefix='sync-pool',
+                )
+    return _pool
+
+
+def run_sync(func):
+    """Awaitable version of `func` that runs on the bounded sync pool."""
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        # Pool threads outlive requests, so recycle their DB connections the
+        # way request_started does for request threads
+        close_old_connections()
+        return func(*args, **kwargs)
+    return sync_to_async(call, thread_sensitive=False, executor=sync_pool())
+
+
+def streaming_content(request, iterator):
+    """
+    Content for a StreamingHttpResponse that streams under both handlers.
+
+    Under ASGI Django buffers a sync iterator whole (it is consumed with
+    sync_to_async(list)), so the iterator is wrapped in an async one.
+    Under WSGI it is returned unchanged.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return _iterate_in_thread(iterator)
+    return iterator
+
+
+async def _iterate_in_thread(iterator):
+    # Every step runs on one dedicated thread: a queryset iterator keeps its
+    # (server-side) cursor on that thread's connection. A long export must
+    # not hold a shared pool thread, hence not run_sync().
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+    loop = asyncio.get_running_loop()
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        # Runs on completion and on client disconnect alike
+        await loop.run_in_executor(executor, _close_iterator, iterator)
+        executor.shutdown(wait=False)
+
+
+def _close_iterator(iterator):
+    close = getattr(iterator, 'close', None)
+    if close:
+        close()
+    connections.close_all()
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can sit in an async middleware chain.
+
+    Stock WhiteNoiseMiddleware is sync-only, which makes Django run every
+    request below it through a thread under ASGI. Static files are still
+    looked up and served synchronously (on the pool); everything else is
+    passed straight through.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await run_sync(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await run_sync(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,148 @@
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.settings import api_settings
+import functools
+import logging
+from .db_router import jwt_user_id
+from .models import User, Post, Comment, Notification
+from .serializers import PostSerializer, CommentSerializer, NotificationSerializer
+from .views import _comments_etag, _conditional_response, _last_modified, _post_etag, _with_validators, POST_VALIDATOR_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Async twins of the hot read and notification endpoints, used in place of
+# the DRF views when ASYNC_API_VIEWS is set (ASGI deployments). Responses
+# match the DRF versions. Queries, including the authenticated user lookup,
+# use the async ORM.
+
+
+def _json(data, status=200):
+    # DRF's renderer, so output is byte-for-byte what the sync views send
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+# -------------------------
+# AUTHENTICATION
+# -------------------------
+
+async def authenticate(request):
+    """JWT user for the request, or None."""
+    # Signature and expiry checks are CPU-only; no need to leave the loop
+    user_id = jwt_user_id(request)
+    if user_id is None:
+        return None
+
+    # Loaded on every request, like JWTAuthentication does, so role changes
+    # and deactivations apply immediately
+    user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def async_api_view(methods):
+    """Method check, JWT authentication and CSRF exemption for async JSON views."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            if request.method not in methods:
+                return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            user = await authenticate(request)
+            if user is None:
+                response = _json({"detail": "Authentication credentials were not provided."}, status=401)
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+                return response
+            request.user = user
+            return await view(request, *args, **kwargs)
+
+        # Set directly: Django 4.2's csrf_exempt() wraps the view in a sync function
+        wrapped.csrf_exempt = True
+        return wrapped
+    return decorator
+
+
+def _not_found(model=None):
+    # Same bodies DRF sends for Http404: get_object_or_404() names the model
+    detail = f"No {model._meta.object_name} matches the given query." if model else "Not found."
+    return _json({"detail": detail}, status=404)
+
+
+# -------------------------
+# POSTS / COMMENTS
+# -------------------------
+
+@async_api_view(['GET'])
+async def post_detail(request, post_id):
+    validators = await Post.objects.filter(id=post_id).values(*POST_VALIDATOR_FIELDS).afirst()
+    if validators is None:
+        return _not_found()
+    etag = _post_etag(post_id, validators)
+    last_modified = _last_modified(validators)
+
+    not_modified = _conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    post = await Post.objects.select_related('author').filter(id=post_id).afirst()
+    if post is None:
+        return _not_found(Post)
+    return _with_validators(_json(PostSerializer(post).data), etag, last_modified)
+
+
+@async_api_view(['GET'])
+async def get_comments(request, post_id):
+    """
+    Fetch approved comments for a post
+    """
+    validators = await Post.objects.filter(id=post_id).values(*POST_VALIDATOR_FIELDS).afirst()
+    if validators is None:
+        return _not_found()
+    etag = _comments_etag(post_id, validators)
+    last_modified = _last_modified(validators)
+
+    not_modified = _conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    comments = [
+        comment async for comment in
+        Comment.objects.filter(post_id=post_id, status='APPROVED').select_related('author')
+    ]
+    data = CommentSerializer(comments, many=True).data
+    return _with_validators(_json(data), etag, last_modified)
+
+
+# -------------------------
+# NOTIFICATIONS
+# -------------------------
+
+@async_api_view(['GET'])
+async def get_notifications(request):
+    """
+    Get all notifications for the authenticated user
+    """
+    notifications = [
+        notification async for notification in
+        Notification.objects.filter(recipient_id=request.user.id).order_by('-updated_at')
+    ]
+    return _json(NotificationSerializer(notifications, many=True).data)
+
+
+@async_api_view(['POST'])
+async def mark_notification_read(request, notification_id):
+    """
+    Mark a specific notification as read
+    """
+    # An update rather than save() leaves updated_at alone, as the sync view does
+    if not await Notification.objects.filter(id=notification_id, recipient_id=request.user.id).aupdate(is_read=True):
+        return _not_found(Notification)
+    return _json({"message": "Notification marked as read"})
+
+
+@async_api_view(['POST'])
+async def mark_all_notifications_read(request):
+    """
+    Mark all notifications as read for the authenticated user
+    """
+    count = await Notification.objects.filter(recipient_id=request.user.id, is_read=False).aupdate(is_read=True)
+    return _json({"message": f"{count} notifications marked as read"})
@@ -0,0 +1,122 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+import logging
+import random
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Reads go to a replica only inside requests that ReplicaRoutingMiddleware
+# marked as safe; everything else (writes, Celery tasks, management commands)
+# uses the primary.
+_use_replica = ContextVar('use_replica', default=False)
+
+STICKY_KEY = 'db-sticky:{}'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _use_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any alias can relate
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send reads of GET/HEAD requests to replicas, with read-your-writes.
+
+    After a user performs an unsafe request, their reads stay on the primary
+    for REPLICA_STICKY_SECONDS so their own new comment or read marker is
+    visible despite replication lag. The user is identified from the JWT
+    without a database lookup; stickiness is stored in Redis and assumed
+    when Redis is unavailable.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = jwt_user_id(request)
+        safe = request.method in ('GET', 'HEAD')
+
+        token = _use_replica.set(safe and not _is_sticky(user_id))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if not safe and user_id and response.status_code < 400:
+            _make_sticky(user_id)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        # Same as __call__, with the sync Redis calls moved off the event loop
+        from .aio import run_sync
+        user_id = jwt_user_id(request)
+        safe = request.method in ('GET', 'HEAD')
+
+        token = _use_replica.set(safe and not await run_sync(_is_sticky)(user_id))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if not safe and user_id and response.status_code < 400:
+            await run_sync(_make_sticky)(user_id)
+        return response
+
+
+def jwt_user_id(request):
+    """User id from the request's JWT, validated without a database lookup."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.settings import api_settings
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except Exception:
+        return None
+
+
+def _is_sticky(user_id):
+    if user_id is None:
+        return False
+    try:
+        return bool(get_redis().exists(STICKY_KEY.format(user_id)))
+    except Exception as e:
+        logger.warning(f"Replica stickiness lookup failed, reading from primary: {e}")
+        return True
+
+
+def _make_sticky(user_id):
+    try:
+        get_redis().set(STICKY_KEY.format(user_id), 1, ex=settings.REPLICA_STICKY_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to record replica stickiness for user {user_id}: {e}")
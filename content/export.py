@@ -0,0 +1,121 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+import csv
+import io
+import json
+import zlib
+from .models import Comment
+
+# Streaming export of moderation decisions. Rows are read with values_list()
+# and iterator() and encoded into ~64KB blocks as they arrive, so memory use
+# does not depend on the size of the export.
+
+# Google Cloud moderateText categories, used as fixed CSV score columns
+MODERATION_CATEGORIES = [
+    'Toxic', 'Insult', 'Profanity', 'Derogatory', 'Sexual', 'Death, Harm & Tragedy',
+    'Violent', 'Firearms & Weapons', 'Public Safety', 'Health', 'Religion & Belief',
+    'Illicit Drugs', 'War & Conflict', 'Politics', 'Finance', 'Legal',
+]
+
+EXPORT_FIELDS = ['id', 'post_id', 'author__username', 'content', 'status', 'created_at', 'updated_at', 'moderation_response']
+COLUMN_NAMES = ['id', 'post_id', 'author', 'content', 'status', 'created_at', 'updated_at']
+FORMATS = ('ndjson', 'csv')
+BLOCK_SIZE = 64 * 1024
+ITERATOR_CHUNK_SIZE = 2000
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def _parse_bound(value, name):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ExportFilterError(f"Invalid {name}: {value}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def export_queryset(status=None, created_after=None, created_before=None):
+    """
+    Comments to export, filtered on the indexed `status` and `created_at`
+    columns and ordered by `created_at` so the scan follows that index.
+    """
+    queryset = Comment.objects.order_by('created_at')
+    if status:
+        queryset = queryset.filter(status__in=status.split(','))
+    if created_after:
+        queryset = queryset.filter(created_at__gte=_parse_bound(created_after, 'created_after'))
+    if created_before:
+        queryset = queryset.filter(created_at__lt=_parse_bound(created_before, 'created_before'))
+    return queryset.values_list(*EXPORT_FIELDS)
+
+
+def _category_scores(moderation_response):
+    categories = (moderation_response or {}).get('moderationCategories', [])
+    return {category.get('name'): category.get('confidence') for category in categories}
+
+
+def _ndjson_lines(rows):
+    for *values, moderation_response in rows:
+        record = dict(zip(COLUMN_NAMES, values))
+        record['scores'] = _category_scores(moderation_response)
+        yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(COLUMN_NAMES + MODERATION_CATEGORIES)
+    yield flush()
+    for *values, moderation_response in rows:
+        scores = _category_scores(moderation_response)
+        writer.writerow(values + [scores.get(name, '') for name in MODERATION_CATEGORIES])
+        yield flush()
+
+
+def _blocks(lines):
+    """Group encoded lines into blocks of roughly BLOCK_SIZE bytes."""
+    block = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        block.append(data)
+        size += len(data)
+        if size >= BLOCK_SIZE:
+            yield b"".join(block)
+            block = []
+            size = 0
+    if block:
+        yield b"".join(block)
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, format='ndjson', compress=False):
+    """Yield the export as bytes blocks, optionally gzip-compressed."""
+    rows = queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    lines = _csv_lines(rows) if format == 'csv' else _ndjson_lines(rows)
+    blocks = _blocks(lines)
+    return _gzip(blocks) if compress else blocks
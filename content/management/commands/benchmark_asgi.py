@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+import io
+import json
+import os
+import requests
+import subprocess
+import sys
+import tempfile
+import time
+
+# One gunicorn worker per mode, so results are per-process capacity
+SERVERS = {
+    'wsgi': ['config.wsgi:application', '--worker-class', 'sync'],
+    'asgi': ['config.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one WSGI (sync) worker with one ASGI (uvicorn) worker on the "
+        "async-capable endpoints at increasing concurrency, using loadtest"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,8,32,128', help="Comma-separated client concurrency levels")
+        parser.add_argument('--duration', type=float, default=15)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--username-prefix', default='seed_user_')
+        parser.add_argument('--password', default='loadtest-password')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        results = {}
+        for mode, target in SERVERS.items():
+            server = self.start_server(mode, target, options['port'])
+            try:
+                for level in levels:
+                    results[(mode, level)] = self.run_load(options, level)
+                    self.stdout.write(
+                        f"  {mode} c={level}: {results[(mode, level)]['rps']:.1f} rps, "
+                        f"p99 {results[(mode, level)]['p99_ms']:.1f} ms"
+                    )
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        self.stdout.write(f"\n{'concurrency':>12}{'wsgi rps':>10}{'asgi rps':>10}{'wsgi p99':>10}{'asgi p99':>10}{'errors':>12}")
+        for level in levels:
+            wsgi, asgi = results[('wsgi', level)], results[('asgi', level)]
+            self.stdout.write(
+                f"{level:>12}{wsgi['rps']:>10.1f}{asgi['rps']:>10.1f}{wsgi['p99_ms']:>10.1f}{asgi['p99_ms']:>10.1f}"
+                f"{wsgi['errors']:>6}/{asgi['errors']:<5}"
+            )
+
+    def start_server(self, mode, target, port):
+        env = {**os.environ, 'ASYNC_API_VIEWS': '1' if mode == 'asgi' else '0', 'RATE_LIMIT_ENABLED': '0'}
+        command = [
+            sys.executable, '-m', 'gunicorn', *target,
+            '--workers', '1', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+        ]
+        server = subprocess.Popen(command, env=env, cwd=settings.BASE_DIR)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{mode} server exited with code {server.returncode}")
+            try:
+                requests.get(f"http://127.0.0.1:{port}/metrics", timeout=1)
+                return server
+            except requests.RequestException:
+                time.sleep(0.5)
+        server.terminate()
+        raise CommandError(f"{mode} server did not start")
+
+    def run_load(self, options, concurrency):
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'loadtest',
+                base_url=f"http://127.0.0.1:{options['port']}",
+                concurrency=concurrency,
+                duration=options['duration'],
+                warmup=2,
+                username_prefix=options['username_prefix'],
+                password=options['password'],
+                scenario=['post_detail', 'get_comments', 'notifications'],
+                output=output.name,
+                stdout=io.StringIO(),
+            )
+            with open(output.name) as f:
+                return json.load(f)['all']
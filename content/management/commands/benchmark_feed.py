@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+import time
+from content.models import User
+from content.views import feed
+
+
+class Command(BaseCommand):
+    help = "Check that the feed endpoint's query count does not grow with page size or previews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='1,10,50,100')
+        parser.add_argument('--comments', default='1,3,10')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        user = User.objects.first()
+        if user is None:
+            raise CommandError("No users found; run seed_data first")
+        factory = APIRequestFactory()
+        page_sizes = [int(v) for v in options['page_sizes'].split(',')]
+        previews = [int(v) for v in options['comments'].split(',')]
+
+        self.stdout.write(f"{'page_size':>10}{'comments':>10}{'posts':>8}{'previews':>10}{'queries':>9}{'ms':>9}")
+        counts = set()
+        for page_size in page_sizes:
+            for k in previews:
+                timings = []
+                for _ in range(options['repeat']):
+                    request = factory.get('/api/feed/', {'page_size': page_size, 'comments': k})
+                    force_authenticate(request, user=user)
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = feed(request)
+                        timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f"Feed returned {response.status_code}: {response.data}")
+                results = response.data['results']
+                shown = sum(len(post['latest_comments']) for post in results)
+                counts.add(len(queries))
+                self.stdout.write(
+                    f"{page_size:>10}{k:>10}{len(results):>8}{shown:>10}{len(queries):>9}"
+                    f"{min(timings) * 1000:>9.1f}"
+                )
+
+        if len(counts) != 1:
+            raise CommandError(f"Query count varies with page size: {sorted(counts)}")
+        self.stdout.write(self.style.SUCCESS(f"Constant {counts.pop()} queries per feed page"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+from content.export import FORMATS, ExportFilterError, export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream comments, statuses and category scores as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--status', help="Comma-separated statuses to include")
+        parser.add_argument('--created-after', help="ISO date or datetime (inclusive)")
+        parser.add_argument('--created-before', help="ISO date or datetime (exclusive)")
+        parser.add_argument('--output', help="File to write to (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            queryset = export_queryset(
+                status=options['status'],
+                created_after=options['created_after'],
+                created_before=options['created_before'],
+            )
+        except ExportFilterError as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for block in stream_export(queryset, format=options['format'], compress=options['gzip']):
+                output.write(block)
+        finally:
+            if options['output']:
+                output.close()
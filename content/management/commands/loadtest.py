@@ -0,0 +1,187 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+import json
+import random
+import re
+import requests
+import threading
+import time
+from content.models import Post, User
+
+SERVER_TIMING_QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# Read-path request mix: (name, weight, path template)
+SCENARIOS = [
+    ('post_list', 2, '/api/posts/'),
+    ('post_detail', 3, '/api/posts/{post_id}/'),
+    ('get_comments', 4, '/api/posts/{post_id}/comments/'),
+    ('notifications', 1, '/api/notifications/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the read endpoints at a fixed concurrency and report throughput, "
+        "latency percentiles and queries per request (from Server-Timing; run "
+        "the server with REQUEST_PROFILING_ENABLED=1 to get query counts, and "
+        "RATE_LIMIT_ENABLED=0 so the load is not throttled)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to run")
+        parser.add_argument('--warmup', type=float, default=3, help="Seconds of unrecorded warmup")
+        parser.add_argument('--username-prefix', default='seed_user_')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--accounts', type=int, default=50, help="Distinct users to log in as")
+        parser.add_argument('--http-login', action='store_true',
+                            help="Log in through /api/auth/login/ (waiting out login rate limits) instead "
+                                 "of minting tokens locally; needed when the server has another SECRET_KEY")
+        parser.add_argument('--hot-posts', type=int, default=1000,
+                            help="Sample post ids from the N most commented posts")
+        parser.add_argument('--scenario', action='append', choices=[s[0] for s in SCENARIOS],
+                            help="Restrict the mix to these scenarios (repeatable)")
+        parser.add_argument('--output', help="Write the summary as JSON to this file")
+        parser.add_argument('--compare', help="Print deltas against a previous --output file")
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        scenarios = [s for s in SCENARIOS if not options['scenario'] or s[0] in options['scenario']]
+
+        post_ids = [str(pk) for pk in Post.objects.order_by('-approved_comment_count')
+                    .values_list('id', flat=True)[:options['hot_posts']]]
+        users = list(User.objects.filter(username__startswith=options['username_prefix'])[:options['accounts']])
+        if not post_ids or not users:
+            raise CommandError("No posts or matching users found; run seed_data first")
+
+        if options['http_login']:
+            tokens = [self.login(base_url, user.username, options['password']) for user in users]
+        else:
+            # Same tokens the login endpoint would issue, without going through
+            # its rate limits (20 logins a minute per address by default)
+            tokens = [str(RefreshToken.for_user(user).access_token) for user in users]
+        self.stdout.write(f"Logged in {len(tokens)} users, {len(post_ids)} hot posts, "
+                          f"concurrency {options['concurrency']}")
+
+        recorder = Recorder()
+        start = time.monotonic()
+        record_from = start + options['warmup']
+        stop_at = record_from + options['duration']
+
+        def worker(seed):
+            rng = random.Random(seed)
+            session = requests.Session()
+            session.headers['Authorization'] = f"Bearer {rng.choice(tokens)}"
+            names, weights, paths = zip(*scenarios)
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    return
+                index = rng.choices(range(len(names)), weights=weights)[0]
+                url = base_url + paths[index].format(post_id=rng.choice(post_ids))
+                began = time.perf_counter()
+                try:
+                    response = session.get(url, timeout=30)
+                    status, queries = response.status_code, _query_count(response)
+                except requests.RequestException:
+                    status, queries = None, None
+                latency = time.perf_counter() - began
+                if now >= record_from:
+                    recorder.add(names[index], latency, status, queries)
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+
+        summary = recorder.summary(options['duration'])
+        self.print_summary(summary)
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.print_comparison(summary, json.load(f))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summary, f, indent=2)
+
+    def login(self, base_url, username, password, max_waits=10):
+        for _ in range(max_waits):
+            response = requests.post(f"{base_url}/api/auth/login/",
+                                     json={'username': username, 'password': password}, timeout=30)
+            if response.status_code != 429:
+                break
+            retry_after = int(response.headers.get('Retry-After', 1))
+            self.stdout.write(f"Login rate limited, waiting {retry_after}s (or run the server with RATE_LIMIT_ENABLED=0)")
+            time.sleep(retry_after)
+        if response.status_code != 200:
+            raise CommandError(f"Login failed for {username}: {response.status_code} {response.text[:200]}")
+        return response.json()['access']
+
+    def print_summary(self, summary):
+        header = f"{'endpoint':<16}{'reqs':>8}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, row in summary.items():
+            queries = '-' if row['queries_mean'] is None else f"{row['queries_mean']:.1f}"
+            self.stdout.write(
+                f"{name:<16}{row['requests']:>8}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{queries:>9}"
+            )
+
+    def print_comparison(self, summary, baseline):
+        self.stdout.write("\nChange vs baseline:")
+        for name, row in summary.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            parts = []
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                if before[key]:
+                    parts.append(f"{key} {(row[key] - before[key]) / before[key] * 100:+.1f}%")
+            self.stdout.write(f"  {name:<16}" + "  ".join(parts))
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, latency, status, queries):
+        with self.lock:
+            self.samples.setdefault(name, []).append((latency, status, queries))
+
+    def summary(self, duration):
+        result = {}
+        everything = []
+        for name, samples in sorted(self.samples.items()):
+            result[name] = _summarize(samples, duration)
+            everything.extend(samples)
+        if everything:
+            result['all'] = _summarize(everything, duration)
+        return result
+
+
+def _summarize(samples, duration):
+    latencies = sorted(s[0] for s in samples)
+    queries = [s[2] for s in samples if s[2] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s[1] is None or s[1] >= 400),
+        'rps': len(samples) / duration,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p95_ms': _percentile(latencies, 95) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'queries_mean': sum(queries) / len(queries) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _query_count(response):
+    match = SERVER_TIMING_QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from content import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts and approved comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        search.rebuild(using=options['database'])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
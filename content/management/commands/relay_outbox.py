@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+import logging
+import time
+from content.outbox import relay_batch
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publish pending outbox messages to Celery in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help="Seconds to sleep when the outbox is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the outbox once and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        logger.info(f"Outbox relay started (batch_size={batch_size})")
+        while True:
+            try:
+                published = relay_batch(batch_size)
+            except Exception as e:
+                logger.error(f"Outbox relay pass failed: {e}")
+                published = 0
+
+            if options['once'] and published < batch_size:
+                break
+            if published < batch_size:
+                # Outbox drained (or broker down); back off before polling again
+                time.sleep(interval)
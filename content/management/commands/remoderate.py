@@ -0,0 +1,142 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from collections import Counter
+import csv
+import json
+import numpy as np
+import time
+from content.models import Comment, Post
+from content.policy import ModerationPolicy
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-apply a moderation policy to stored moderateText responses without "
+        "calling the API. Dry-run by default; pass --apply to write changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', required=True,
+                            help="New policy as a JSON object or a path to a JSON file")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--diff-file', help="Write changed comment ids to this CSV file")
+        parser.add_argument('--apply', action='store_true', help="Apply status changes")
+
+    def handle(self, *args, **options):
+        new_policy = ModerationPolicy(self.load_policy(options['policy']))
+        current_policy = ModerationPolicy.from_settings()
+        batch_size = options['batch_size']
+
+        # Only machine decisions are re-evaluated: a comment whose status
+        # disagrees with the current policy was decided by an admin and is
+        # left alone, as are REJECTED comments
+        queryset = (
+            Comment.objects.filter(
+                status__in=['APPROVED', 'FLAGGED'],
+                moderation_response__has_key='moderationCategories',
+            )
+            .values_list('id', 'status', 'moderation_response')
+        )
+
+        diff_file = open(options['diff_file'], 'w', newline='') if options['diff_file'] else None
+        diff_writer = csv.writer(diff_file) if diff_file else None
+        if diff_writer:
+            diff_writer.writerow(['comment_id', 'old_status', 'new_status'])
+
+        counts = {'scanned': 0, 'admin_decided': 0, 'APPROVED->FLAGGED': 0, 'FLAGGED->APPROVED': 0}
+        started = time.monotonic()
+        last_id = None
+        try:
+            # Keyset pagination over the primary key: memory is bounded by the
+            # batch size, no transaction or cursor is held for the whole run,
+            # and rows updated by --apply are never revisited
+            while True:
+                page = queryset.order_by('id')
+                if last_id is not None:
+                    page = page.filter(id__gt=last_id)
+                batch = list(page[:batch_size])
+                if not batch:
+                    break
+                self.process_batch(batch, current_policy, new_policy, counts, diff_writer, options['apply'])
+                last_id = batch[-1][0]
+        finally:
+            if diff_file:
+                diff_file.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"Scanned {counts['scanned']} comments in {elapsed:.1f}s")
+        self.stdout.write(f"Skipped (admin decided): {counts['admin_decided']}")
+        self.stdout.write(f"APPROVED -> FLAGGED:     {counts['APPROVED->FLAGGED']}")
+        self.stdout.write(f"FLAGGED -> APPROVED:     {counts['FLAGGED->APPROVED']}")
+        if not options['apply']:
+            self.stdout.write(self.style.WARNING("Dry run: no changes written (use --apply)"))
+        else:
+            # Admin overrides are detected against the configured policy, so
+            # it has to match what was applied before the next run
+            self.stdout.write(self.style.WARNING("Set MODERATION_POLICY to the applied policy before the next run"))
+
+    def load_policy(self, value):
+        try:
+            if value.lstrip().startswith('{'):
+                return json.loads(value)
+            with open(value) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Invalid policy: {e}")
+
+    def process_batch(self, batch, current_policy, new_policy, counts, diff_writer, apply):
+        ids, statuses, responses = zip(*batch)
+        statuses = np.array(statuses)
+        was_flagged = current_policy.evaluate_batch(responses)
+        now_flagged = new_policy.evaluate_batch(responses)
+
+        machine_decided = (statuses == 'FLAGGED') == was_flagged
+        changed = machine_decided & (was_flagged != now_flagged)
+
+        counts['scanned'] += len(batch)
+        counts['admin_decided'] += int((~machine_decided).sum())
+
+        to_flag = [ids[i] for i in np.flatnonzero(changed & now_flagged)]
+        to_approve = [ids[i] for i in np.flatnonzero(changed & ~now_flagged)]
+        counts['APPROVED->FLAGGED'] += len(to_flag)
+        counts['FLAGGED->APPROVED'] += len(to_approve)
+
+        if diff_writer:
+            diff_writer.writerows((comment_id, 'APPROVED', 'FLAGGED') for comment_id in to_flag)
+            diff_writer.writerows((comment_id, 'FLAGGED', 'APPROVED') for comment_id in to_approve)
+
+        if apply:
+            self.apply_changes(to_flag, 'APPROVED', 'FLAGGED')
+            self.apply_changes(to_approve, 'FLAGGED', 'APPROVED')
+
+    def apply_changes(self, ids, from_status, to_status):
+        """
+        One compare-and-set UPDATE per direction and batch, so comments
+        touched by an admin since they were read are not overwritten. Post
+        comment counters are adjusted for the rows actually changed.
+        """
+        if not ids:
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            changed = list(
+                Comment.objects.select_for_update()
+                .filter(id__in=ids, status=from_status)
+                .values_list('id', 'post_id')
+            )
+            if not changed:
+                return
+            Comment.objects.filter(id__in=[comment_id for comment_id, _ in changed]).update(
+                status=to_status, updated_at=now
+            )
+
+            delta = 1 if to_status == 'APPROVED' else -1
+            for post_id, count in Counter(post_id for _, post_id in changed).items():
+                Post.objects.filter(id=post_id).update(
+                    approved_comment_count=F('approved_comment_count') + delta * count,
+                    comment_version=F('comment_version') + 1,
+                    comments_changed_at=now,
+                )
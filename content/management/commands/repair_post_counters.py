@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max
+from django.utils import timezone
+from content.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.approved_comment_count and last_activity_at from comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = None
+        scanned = 0
+        fixed = 0
+
+        # Keyset pagination over posts; each chunk costs one aggregate query
+        # over the chunk's comments and one bulk update of drifted rows
+        while True:
+            page = Post.objects.order_by('id').only('id', 'approved_comment_count', 'last_activity_at', 'comment_version')
+            if last_id is not None:
+                page = page.filter(id__gt=last_id)
+            posts = list(page[:batch_size])
+            if not posts:
+                break
+
+            actual = {
+                row['post']: row
+                for row in Comment.objects.filter(post__in=posts, status='APPROVED')
+                .values('post')
+                .annotate(count=Count('id'), last_activity=Max('updated_at'))
+                .order_by()
+            }
+
+            drifted = []
+            for post in posts:
+                row = actual.get(post.id, {'count': 0, 'last_activity': None})
+                if (post.approved_comment_count, post.last_activity_at) != (row['count'], row['last_activity']):
+                    post.approved_comment_count = row['count']
+                    post.last_activity_at = row['last_activity']
+                    drifted.append(post)
+
+            if drifted:
+                # Bump the cache validators too, since cached reads may be stale
+                now = timezone.now()
+                for post in drifted:
+                    post.comment_version += 1
+                    post.comments_changed_at = now
+                Post.objects.bulk_update(
+                    drifted,
+                    ['approved_comment_count', 'last_activity_at', 'comment_version', 'comments_changed_at'],
+                )
+
+            scanned += len(posts)
+            fixed += len(drifted)
+            last_id = posts[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {scanned} posts, repaired {fixed}"))
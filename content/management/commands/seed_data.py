@@ -0,0 +1,243 @@
+from contextlib import contextmanager
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+import csv
+import io
+import json
+import numpy as np
+import uuid
+from content.models import Comment, Notification, Post, User
+
+WORDS = (
+    "the a this that great post thanks agree disagree interesting point really "
+    "good bad idea think love hate read more article comment nice work why how "
+    "what when people about update news question answer help please maybe"
+).split()
+
+# Status mix for seeded comments. Only decided statuses: a seeded comment has
+# no moderation task behind it, so an UNDER_REVIEW one would look stuck and
+# the sweeper would send it to the moderation API.
+STATUS_WEIGHTS = {'APPROVED': 0.88, 'FLAGGED': 0.07, 'REJECTED': 0.05}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, posts, comments and notifications with a "
+        "realistic skew (hot posts, heavy commenters) for performance testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--notifications', type=int, default=500000)
+        parser.add_argument('--days', type=int, default=90, help="Spread timestamps over this many days")
+        parser.add_argument('--skew', type=float, default=1.2,
+                            help="Zipf exponent for post popularity and commenter activity")
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--password', default='loadtest-password',
+                            help="Password for every seeded user (hashed once)")
+        parser.add_argument('--copy', action='store_true',
+                            help="Use PostgreSQL COPY instead of bulk_create")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = np.random.default_rng(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy'] and connection.vendor == 'postgresql'
+        if options['copy'] and not self.use_copy:
+            self.stdout.write(self.style.WARNING("COPY needs PostgreSQL, falling back to bulk_create"))
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+
+        with explicit_timestamps():
+            user_ids, admin_ids = self.seed_users(options['users'], options['admins'], options['password'])
+            post_ids = self.seed_posts(options['posts'], user_ids)
+            self.seed_comments(options['comments'], post_ids, user_ids, options['skew'])
+            self.seed_notifications(options['notifications'], user_ids + admin_ids)
+
+        self.stdout.write("Rebuilding post comment counters...")
+        call_command('repair_post_counters', batch_size=self.batch_size, stdout=self.stdout)
+
+    # -------------------------
+    # GENERATORS
+    # -------------------------
+
+    def seed_users(self, count, admins, password):
+        # One PBKDF2 hash shared by every seeded user
+        password_hash = make_password(password)
+        run = uuid.uuid4().hex[:6]
+        user_ids = [uuid.uuid4() for _ in range(count)]
+        admin_ids = [uuid.uuid4() for _ in range(admins)]
+
+        def rows():
+            for i, user_id in enumerate(user_ids + admin_ids):
+                is_admin = i >= count
+                yield User(
+                    id=user_id,
+                    username=f"seed_{'admin' if is_admin else 'user'}_{run}_{i}",
+                    email=f"seed_{run}_{i}@example.com",
+                    password=password_hash,
+                    role='admin' if is_admin else 'user',
+                    date_joined=self.random_time(),
+                )
+
+        self.insert(User, rows(), count + admins)
+        self.stdout.write(f"Seeded users with prefix seed_user_{run}_ / seed_admin_{run}_ (password: {password})")
+        return user_ids, admin_ids
+
+    def seed_posts(self, count, user_ids):
+        post_ids = [uuid.uuid4() for _ in range(count)]
+
+        def rows():
+            authors = self.rng.integers(0, len(user_ids), size=count)
+            for post_id, author in zip(post_ids, authors):
+                created = self.random_time()
+                yield Post(
+                    id=post_id,
+                    author_id=user_ids[author],
+                    title=self.sentence(4, 10).capitalize(),
+                    content=self.sentence(30, 120),
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self.insert(Post, rows(), count)
+        return post_ids
+
+    def seed_comments(self, count, post_ids, user_ids, skew):
+        statuses = list(STATUS_WEIGHTS)
+        weights = np.array(list(STATUS_WEIGHTS.values()))
+
+        def rows():
+            for start in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - start)
+                # Zipf ranks give a few very hot posts and heavy commenters
+                posts = self.zipf_choice(len(post_ids), size, skew)
+                authors = self.zipf_choice(len(user_ids), size, skew)
+                picked = self.rng.choice(len(statuses), size=size, p=weights / weights.sum())
+                for post, author, status_index in zip(posts, authors, picked):
+                    status = statuses[status_index]
+                    created = self.random_time()
+                    yield Comment(
+                        id=uuid.uuid4(),
+                        post_id=post_ids[post],
+                        author_id=user_ids[author],
+                        content=self.sentence(5, 60),
+                        status=status,
+                        moderation_response=self.moderation_response(status),
+                        created_at=created,
+                        updated_at=created,
+                    )
+
+        self.insert(Comment, rows(), count)
+
+    def seed_notifications(self, count, user_ids):
+        def rows():
+            recipients = self.rng.integers(0, len(user_ids), size=count)
+            read = self.rng.random(count) < 0.7
+            for recipient, is_read in zip(recipients, read):
+                created = self.random_time()
+                yield Notification(
+                    id=uuid.uuid4(),
+                    recipient_id=user_ids[recipient],
+                    message="Your comment has been successfully posted.",
+                    is_read=bool(is_read),
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self.insert(Notification, rows(), count)
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def random_time(self):
+        return self.now - timedelta(seconds=float(self.rng.random() * self.span))
+
+    def sentence(self, low, high):
+        return " ".join(self.rng.choice(WORDS, size=int(self.rng.integers(low, high))))
+
+    def zipf_choice(self, n, size, skew):
+        ranks = self.rng.zipf(skew, size=size) if skew > 1 else self.rng.integers(1, n + 1, size=size)
+        return (ranks - 1) % n
+
+    def moderation_response(self, status):
+        flagged = status in ('FLAGGED', 'REJECTED')
+        return {'moderationCategories': [
+            {'name': 'Toxic', 'confidence': round(float(self.rng.uniform(0.65, 0.99) if flagged else self.rng.uniform(0, 0.4)), 4)},
+            {'name': 'Insult', 'confidence': round(float(self.rng.uniform(0, 0.5)), 4)},
+        ]}
+
+    def insert(self, model, objects, total):
+        label = model._meta.verbose_name_plural
+        inserted = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                inserted += self.write_batch(model, batch)
+                batch = []
+                self.stdout.write(f"  {label}: {inserted}/{total}", ending='\r')
+        if batch:
+            inserted += self.write_batch(model, batch)
+        self.stdout.write(f"  {label}: {inserted}/{total}")
+
+    def write_batch(self, model, batch):
+        if self.use_copy:
+            copy_rows(model, batch)
+        else:
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+        return len(batch)
+
+
+def copy_rows(model, objects):
+    """Load model instances with PostgreSQL COPY ... FROM STDIN (CSV)."""
+    fields = [f for f in model._meta.concrete_fields]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objects:
+        writer.writerow([_copy_value(getattr(obj, f.attname)) for f in fields])
+    buffer.seek(0)
+
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def _copy_value(value):
+    # Unquoted empty fields are NULL in COPY's CSV format
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let seeded rows keep their generated created_at / updated_at."""
+    patched = []
+    for model in (User, Post, Comment, Notification):
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                patched.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in patched:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
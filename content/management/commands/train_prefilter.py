@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import numpy as np
+from content.models import Comment
+from content.prefilter import PrefilterModel
+from content.tasks import is_flagged
+
+
+class Command(BaseCommand):
+    help = "Train the local moderation pre-filter from stored moderation verdicts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--holdout', type=float, default=0.2,
+                            help="Fraction of comments held out for the report")
+        parser.add_argument('--calibration', type=float, default=0.2,
+                            help="Fraction of the remaining comments used to pick the threshold")
+        parser.add_argument('--max-miss-rate', type=float, default=0.005,
+                            help="Max fraction of flagged comments allowed under the threshold")
+        parser.add_argument('--n-features', type=int, default=2 ** 18)
+        parser.add_argument('--epochs', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Use at most this many of the most recent comments")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default=settings.PREFILTER_MODEL_PATH)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Print the report without saving the model")
+
+    def handle(self, *args, **options):
+        if options['n_features'] & (options['n_features'] - 1):
+            raise CommandError("--n-features must be a power of two")
+
+        texts, labels = self.load_dataset(options['limit'])
+        if len(texts) < 100:
+            raise CommandError(f"Need at least 100 moderated comments to train, found {len(texts)}")
+
+        rng = np.random.default_rng(options['seed'])
+        order = rng.permutation(len(texts))
+        n_holdout = int(len(order) * options['holdout'])
+        holdout, rest = order[:n_holdout], order[n_holdout:]
+        n_calibration = int(len(rest) * options['calibration'])
+        calibration, train = rest[:n_calibration], rest[n_calibration:]
+
+        pick = lambda idx: ([texts[i] for i in idx], labels[idx])
+
+        self.stdout.write(f"Training on {len(train)} comments ({labels[train].mean():.1%} flagged)")
+        model = PrefilterModel.train(*pick(train), n_features=options['n_features'], epochs=options['epochs'])
+        threshold = model.calibrate(*pick(calibration), max_miss_rate=options['max_miss_rate'])
+        self.stdout.write(f"Auto-approve threshold: {threshold:.4f}")
+
+        self.report(model, *pick(holdout))
+
+        if not options['dry_run']:
+            model.save(options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Model saved to {options['output']}"))
+
+    def load_dataset(self, limit):
+        """
+        Comments with a stored API verdict; admin rejections count as flagged
+        regardless of the API scores.
+        """
+        queryset = (
+            Comment.objects.filter(moderation_response__has_key='moderationCategories')
+            .order_by('-created_at')
+            .values_list('content', 'status', 'moderation_response')
+        )
+        if limit:
+            queryset = queryset[:limit]
+
+        texts = []
+        labels = []
+        for content, status, response in queryset.iterator(chunk_size=2000):
+            texts.append(content)
+            labels.append(status == 'REJECTED' or is_flagged(response['moderationCategories']) is not None)
+        return texts, np.asarray(labels, dtype=bool)
+
+    def report(self, model, texts, labels):
+        if not len(texts):
+            self.stdout.write("No held-out comments to report on")
+            return
+
+        clean = model.is_clean(texts)
+        auto_approved = int(clean.sum())
+        missed = int((clean & labels).sum())
+        agreement = 1 - missed / auto_approved if auto_approved else 1.0
+
+        self.stdout.write(f"Held-out comments:       {len(texts)}")
+        self.stdout.write(f"API calls avoided:       {auto_approved} ({auto_approved / len(texts):.1%})")
+        self.stdout.write(f"Agreement with API:      {agreement:.2%} of auto-approved comments")
+        self.stdout.write(f"Flagged comments missed: {missed} of {int(labels.sum())}")
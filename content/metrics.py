@@ -0,0 +1,175 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+import hmac
+import ipaddress
+import os
+import time
+
+# -------------------------
+# METRIC DEFINITIONS
+# -------------------------
+# Labels are kept to small, fixed sets (status, source, route name) so the
+# series count stays bounded regardless of traffic.
+
+MODERATION_LAG = Histogram(
+    'moderation_queue_lag_seconds',
+    'Time from comment creation to moderation decision',
+    ['source'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 900, 3600),
+)
+
+MODERATION_API_LATENCY = Histogram(
+    'moderation_api_request_seconds',
+    'Google Cloud moderateText request latency',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+MODERATION_API_ERRORS = Counter(
+    'moderation_api_errors_total',
+    'Google Cloud moderateText errors by HTTP status code or error kind',
+    ['code'],
+)
+
+MODERATION_DECISIONS = Counter(
+    'moderation_decisions_total',
+    'Moderation decisions by resulting status and decision source',
+    ['status', 'source'],
+)
+
+NOTIFICATIONS_CREATED = Counter(
+    'notifications_created_total',
+    'Notification rows written',
+    ['kind'],
+)
+
+ADMIN_ACTIONS = Counter(
+    'admin_comment_actions_total',
+    'Admin review actions by outcome',
+    ['action', 'outcome'],
+)
+
+RATE_LIMITED = Counter(
+    'rate_limited_requests_total',
+    'Requests rejected by the sliding-window rate limiter',
+    ['endpoint', 'scope'],
+)
+
+STUCK_COMMENTS = Gauge(
+    'moderation_stuck_comments',
+    'Comments waiting past the sweeper threshold, by status, at the last sweep',
+    ['status'],
+    multiprocess_mode='livemax',
+)
+
+STUCK_COMMENTS_REQUEUED = Counter(
+    'moderation_stuck_comments_requeued_total',
+    'Stuck comments re-enqueued by the sweeper',
+    ['status'],
+)
+
+HTTP_REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def observe_decision(comment, source):
+    """Record a moderation decision and its queue lag."""
+    MODERATION_DECISIONS.labels(status=comment.status, source=source).inc()
+    if comment.created_at:
+        MODERATION_LAG.labels(source=source).observe((comment.updated_at - comment.created_at).total_seconds())
+
+
+# -------------------------
+# EXPORT
+# -------------------------
+
+def get_registry():
+    """
+    Registry to export from.
+
+    With PROMETHEUS_MULTIPROC_DIR set (gunicorn and Celery prefork), every
+    process writes its samples to that directory and the exporting process
+    aggregates them; otherwise the in-process default registry is used.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint.
+
+    Served on the public app port, so it answers only scrapers presenting
+    METRICS_TOKEN as a bearer token, or (without a token configured) clients
+    whose address is in METRICS_ALLOWED_NETWORKS. Anyone else gets a 404.
+    """
+    if not _scrape_allowed(request):
+        raise Http404
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def _scrape_allowed(request):
+    if settings.METRICS_TOKEN:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(supplied.encode(), f"Bearer {settings.METRICS_TOKEN}".encode())
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+# Clients can send any method token; anything else is labelled 'other'
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+class MetricsMiddleware:
+    """
+    Record request latency labelled by the resolved URL name.
+
+    Unresolved paths are grouped under a single label so scanners cannot
+    create unbounded series. Works in both sync (WSGI) and async (ASGI)
+    middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    def _observe(self, request, response, start):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        HTTP_REQUEST_LATENCY.labels(
+            method=request.method if request.method in HTTP_METHODS else 'other',
+            route=route,
+            status=f"{response.status_code // 100}xx",
+        ).observe(time.perf_counter() - start)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('UNDER_REVIEW', 'Under Review'), ('MODERATING', 'Moderating'), ('APPROVED', 'Approved'), ('FLAGGED', 'Flagged'), ('REJECTED', 'Rejected')], db_index=True, default='UNDER_REVIEW', max_length=20),
+        ),
+    ]
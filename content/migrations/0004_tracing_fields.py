@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_comment_moderating_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='stage_timings',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='headers',
+            field=models.JSONField(default=dict),
+        ),
+    ]
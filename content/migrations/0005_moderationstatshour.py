@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_tracing_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationStatsHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField(unique=True)),
+                ('comments_submitted', models.PositiveIntegerField(default=0)),
+                ('auto_approved', models.PositiveIntegerField(default=0)),
+                ('auto_flagged', models.PositiveIntegerField(default=0)),
+                ('fallback_decisions', models.PositiveIntegerField(default=0)),
+                ('admin_approved', models.PositiveIntegerField(default=0)),
+                ('admin_rejected', models.PositiveIntegerField(default=0)),
+                ('admin_review_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'db_table': 'moderation_stats_hourly',
+                'ordering': ['-bucket_start'],
+            },
+        ),
+    ]
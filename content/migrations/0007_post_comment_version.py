@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_post_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing notifications keep their place in the list
+    Notification = apps.get_model('content', 'Notification')
+    Notification.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_post_comment_version'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-updated_at']},
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('MESSAGE', 'Message'), ('FLAGGED_DIGEST', 'Flagged comments digest')], default='MESSAGE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('kind', 'FLAGGED_DIGEST')), fields=('recipient',), name='one_open_flagged_digest_per_recipient'),
+        ),
+    ]
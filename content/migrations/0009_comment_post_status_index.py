@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_notification_flagged_digest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'status', '-created_at'], name='comment_post_status_created'),
+        ),
+    ]
@@ -0,0 +1,134 @@
+from django.db import migrations
+
+# Full-text search indexes maintained by triggers, so every write path
+# (save(), queryset .update() status transitions, bulk_create, COPY) keeps
+# them current. Only APPROVED comments are indexed.
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE posts ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER posts_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON posts
+    FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+    """,
+    """
+    UPDATE posts SET search_vector =
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    """,
+    "CREATE INDEX posts_search_vector_gin ON posts USING GIN (search_vector)",
+
+    "ALTER TABLE comments ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION comments_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := CASE WHEN NEW.status = 'APPROVED'
+            THEN to_tsvector('english', coalesce(NEW.content, '')) END;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER comments_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content, status ON comments
+    FOR EACH ROW EXECUTE FUNCTION comments_search_vector_update()
+    """,
+    """
+    UPDATE comments SET search_vector = to_tsvector('english', coalesce(content, ''))
+    WHERE status = 'APPROVED'
+    """,
+    "CREATE INDEX comments_search_vector_gin ON comments USING GIN (search_vector) WHERE search_vector IS NOT NULL",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS comments_search_vector_trigger ON comments",
+    "DROP FUNCTION IF EXISTS comments_search_vector_update()",
+    "ALTER TABLE comments DROP COLUMN IF EXISTS search_vector",
+    "DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts",
+    "DROP FUNCTION IF EXISTS posts_search_vector_update()",
+    "ALTER TABLE posts DROP COLUMN IF EXISTS search_vector",
+]
+
+# FTS5 tables keyed by the source table's rowid, so trigger deletes are
+# cheap rowid lookups (see content.search.rebuild after a VACUUM)
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content) VALUES (NEW.rowid, NEW.title, NEW.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN
+        DELETE FROM posts_fts WHERE rowid = OLD.rowid;
+        INSERT INTO posts_fts(rowid, title, content) VALUES (NEW.rowid, NEW.title, NEW.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN
+        DELETE FROM posts_fts WHERE rowid = OLD.rowid;
+    END
+    """,
+    "INSERT INTO posts_fts(rowid, title, content) SELECT rowid, title, content FROM posts",
+
+    "CREATE VIRTUAL TABLE comments_fts USING fts5(content, tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER comments_fts_insert AFTER INSERT ON comments WHEN NEW.status = 'APPROVED' BEGIN
+        INSERT INTO comments_fts(rowid, content) VALUES (NEW.rowid, NEW.content);
+    END
+    """,
+    """
+    CREATE TRIGGER comments_fts_update AFTER UPDATE OF content, status ON comments BEGIN
+        DELETE FROM comments_fts WHERE rowid = OLD.rowid;
+        INSERT INTO comments_fts(rowid, content) SELECT NEW.rowid, NEW.content WHERE NEW.status = 'APPROVED';
+    END
+    """,
+    """
+    CREATE TRIGGER comments_fts_delete AFTER DELETE ON comments BEGIN
+        DELETE FROM comments_fts WHERE rowid = OLD.rowid;
+    END
+    """,
+    "INSERT INTO comments_fts(rowid, content) SELECT rowid, content FROM comments WHERE status = 'APPROVED'",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS comments_fts_delete",
+    "DROP TRIGGER IF EXISTS comments_fts_update",
+    "DROP TRIGGER IF EXISTS comments_fts_insert",
+    "DROP TABLE IF EXISTS comments_fts",
+    "DROP TRIGGER IF EXISTS posts_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_fts_update",
+    "DROP TRIGGER IF EXISTS posts_fts_insert",
+    "DROP TABLE IF EXISTS posts_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_comment_post_status_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', 'created_at'], name='comment_status_created'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations, transaction
+from django.db.models import Count, Max
+
+BATCH_SIZE = 1000
+
+
+def backfill_post_counters(apps, schema_editor):
+    # 0006 added the counters with their empty defaults; fill them in for
+    # posts that already had approved comments. Same computation as
+    # repair_post_counters, committed per batch so large tables do not hold
+    # one long transaction.
+    Post = apps.get_model('content', 'Post')
+    Comment = apps.get_model('content', 'Comment')
+    db_alias = schema_editor.connection.alias
+
+    last_id = None
+    while True:
+        page = Post.objects.using(db_alias).order_by('id').only('id', 'approved_comment_count', 'last_activity_at')
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        posts = list(page[:BATCH_SIZE])
+        if not posts:
+            break
+
+        actual = {
+            row['post']: row
+            for row in Comment.objects.using(db_alias)
+            .filter(post__in=posts, status='APPROVED')
+            .values('post')
+            .annotate(count=Count('id'), last_activity=Max('updated_at'))
+            .order_by()
+        }
+
+        drifted = []
+        for post in posts:
+            row = actual.get(post.id, {'count': 0, 'last_activity': None})
+            if (post.approved_comment_count, post.last_activity_at) != (row['count'], row['last_activity']):
+                post.approved_comment_count = row['count']
+                post.last_activity_at = row['last_activity']
+                drifted.append(post)
+
+        if drifted:
+            with transaction.atomic(using=db_alias):
+                Post.objects.using(db_alias).bulk_update(drifted, ['approved_comment_count', 'last_activity_at'])
+        last_id = posts[-1].id
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('content', '0011_comment_status_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_post_counters, migrations.RunPython.noop),
+    ]
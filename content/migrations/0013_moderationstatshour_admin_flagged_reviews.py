@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_backfill_post_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationstatshour',
+            name='admin_flagged_reviews',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
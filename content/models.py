@@ -1,7 +1,10 @@
 
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 # -------------------------
 # USER
@@ -52,6 +55,15 @@ class Post(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
 
+    # Denormalized from comments; maintained by Comment.transition() and
+    # rebuilt with `python manage.py repair_post_counters`
+    approved_comment_count = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    # Bumped whenever the set of approved comments changes; used with
+    # comments_changed_at as the HTTP cache validator for comment reads
+    comment_version = models.PositiveIntegerField(default=0)
+    comments_changed_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -70,6 +82,7 @@ class Post(models.Model):
 class Comment(models.Model):
     STATUS_CHOICES = [
         ('UNDER_REVIEW', 'Under Review'),
+        ('MODERATING', 'Moderating'),
         ('APPROVED', 'Approved'),
         ('FLAGGED', 'Flagged'),
         ('REJECTED', 'Rejected'),
@@ -103,6 +116,9 @@ class Comment(models.Model):
     )
 
     moderation_response = models.JSONField(null=True, blank=True)
+    # Milliseconds from created_at to each moderation stage (published,
+    # started, token_fetched, api_responded, decided) for latency analysis
+    stage_timings = models.JSONField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -110,10 +126,65 @@ class Comment(models.Model):
     class Meta:
         ordering = ['created_at']
         db_table = 'comments'
+        indexes = [
+            # Approved comments of a post, newest first (feed previews, comment list)
+            models.Index(fields=['post', 'status', '-created_at'], name='comment_post_status_created'),
+            # Oldest comments in a status (stuck-comment sweeper)
+            models.Index(fields=['status', 'created_at'], name='comment_status_created'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    def transition(self, from_status, to_status, **fields):
+        """
+        Compare-and-set status change.
+
+        Updates the row only if its status is still `from_status` (a status or
+        a list of statuses), so concurrent workers and admins can never
+        overwrite each other's decisions. The post's approved-comment counter
+        is adjusted in the same transaction when the comment enters or leaves
+        APPROVED.
+
+        Returns:
+            bool: True if this call performed the transition
+        """
+        if isinstance(from_status, str):
+            from_status = [from_status]
+
+        # One conditional update per candidate status, so the status that was
+        # actually replaced (and hence the counter delta) is known
+        for status in from_status:
+            if self._transition_from(status, to_status, fields):
+                return True
+        return False
+
+    def _transition_from(self, from_status, to_status, fields):
+        now = timezone.now()
+        with transaction.atomic():
+            updated = Comment.objects.filter(id=self.id, status=from_status).update(
+                status=to_status, updated_at=now, **fields
+            )
+            if not updated:
+                return False
+
+            delta = (to_status == 'APPROVED') - (from_status == 'APPROVED')
+            if delta:
+                counters = {
+                    'approved_comment_count': F('approved_comment_count') + delta,
+                    'comment_version': F('comment_version') + 1,
+                    'comments_changed_at': now,
+                }
+                if delta > 0:
+                    counters['last_activity_at'] = now
+                Post.objects.filter(id=self.post_id).update(**counters)
+
+        self.status = to_status
+        self.updated_at = now
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
 
 # -------------------------
 # NOTIFICATION
@@ -132,14 +203,132 @@ class Notification(models.Model):
         related_name='notifications'
     )
 
+    KIND_CHOICES = (
+        ('MESSAGE', 'Message'),
+        ('FLAGGED_DIGEST', 'Flagged comments digest'),
+    )
+
     message = models.TextField()
     is_read = models.BooleanField(default=False)
 
+    # A FLAGGED_DIGEST row counts flags since it was created; it stays open
+    # (and keeps being incremented) until the admin reads it
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='MESSAGE')
+    count = models.PositiveIntegerField(default=1)
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-updated_at']
         db_table = 'notifications'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient'],
+                condition=models.Q(kind='FLAGGED_DIGEST', is_read=False),
+                name='one_open_flagged_digest_per_recipient',
+            ),
+        ]
+
+    @property
+    def display_message(self):
+        if self.kind != 'FLAGGED_DIGEST':
+            return self.message
+        since = timezone.localtime(self.created_at).strftime('%H:%M')
+        noun, verb = ("comment", "requires") if self.count == 1 else ("comments", "require")
+        return f"{self.count} new flagged {noun} since {since} {verb} review"
+
+    @classmethod
+    def bump_flagged_digest(cls, recipient_ids):
+        """
+        Count one more flagged comment in each recipient's open digest.
+
+        Recipients without an open digest get one first (the partial unique
+        constraint makes concurrent creation safe), then every open digest
+        is incremented by a single UPDATE. A constant number of queries per flag
+        however many admins there are, and no new rows while digests are open.
+
+        Returns:
+            int: number of digests created
+        """
+        recipient_ids = set(recipient_ids)
+        if not recipient_ids:
+            return 0
+        open_digests = cls.objects.filter(kind='FLAGGED_DIGEST', is_read=False, recipient_id__in=recipient_ids)
+        missing = recipient_ids - set(open_digests.values_list('recipient_id', flat=True))
+        if missing:
+            cls.objects.bulk_create(
+                [cls(recipient_id=rid, kind='FLAGGED_DIGEST', count=0, message="Flagged comments require review")
+                 for rid in missing],
+                ignore_conflicts=True,
+            )
+        open_digests.update(count=F('count') + 1, updated_at=timezone.now())
+        return len(missing)
 
     def __str__(self):
         return f"Notification for {self.recipient.username}"
+
+
+# -------------------------
+# OUTBOX
+# -------------------------
+
+class OutboxMessage(models.Model):
+    """
+    Celery task waiting to be published to the broker.
+
+    Rows are written in the same transaction as the data they refer to and
+    drained by the `relay_outbox` management command, so the request path
+    never talks to Redis directly.
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    headers = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['created_at']
+        db_table = 'outbox'
+
+    def __str__(self):
+        return f"{self.task_name}{tuple(self.args)}"
+
+
+# -------------------------
+# MODERATION STATS
+# -------------------------
+
+class ModerationStatsHour(models.Model):
+    """
+    Hourly moderation counters, incremented in place by the submission,
+    moderation and admin-action paths so dashboards never scan `comments`.
+    """
+    bucket_start = models.DateTimeField(unique=True)
+
+    comments_submitted = models.PositiveIntegerField(default=0)
+    auto_approved = models.PositiveIntegerField(default=0)
+    auto_flagged = models.PositiveIntegerField(default=0)
+    fallback_decisions = models.PositiveIntegerField(default=0)
+    admin_approved = models.PositiveIntegerField(default=0)
+    admin_rejected = models.PositiveIntegerField(default=0)
+    # Admin decisions on FLAGGED comments, and the sum of seconds from the
+    # flag to the decision (approvals/rejections of comments in other
+    # states have no flag time and are not counted here)
+    admin_flagged_reviews = models.PositiveIntegerField(default=0)
+    admin_review_seconds = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-bucket_start']
+        db_table = 'moderation_stats_hourly'
+
+    def __str__(self):
+        return f"Moderation stats for {self.bucket_start:%Y-%m-%d %H:00}"
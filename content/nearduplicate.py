@@ -0,0 +1,187 @@
+from django.conf import settings
+import hashlib
+import logging
+import numpy as np
+import re
+import threading
+import time
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate detection for coordinated spam. Each comment gets a 64-bit
+# SimHash; the signature is split into BANDS 16-bit bands and indexed per
+# band. Two signatures within BANDS - 1 bits of each other must agree exactly
+# on at least one band, so a lookup only compares against the few entries
+# sharing a band instead of scanning the index.
+
+TOKEN_RE = re.compile(r"\w+")
+BANDS = 4
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def simhash(text):
+    """
+    64-bit SimHash over word unigrams and bigrams.
+
+    Returns None for texts too short for a meaningful signature.
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < settings.NEAR_DUPLICATE_MIN_TOKENS:
+        return None
+
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    digests = b"".join(hashlib.blake2b(f.encode('utf-8'), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(features), 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int("".join('1' if v > 0 else '0' for v in votes), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def bands(signature):
+    return [(i, (signature >> (i * BAND_BITS)) & BAND_MASK) for i in range(BANDS)]
+
+
+class MemoryIndex:
+    """Per-process index with time-based eviction; for tests and single-process setups."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def add(self, signature, comment_id, ttl):
+        expires = time.time() + ttl
+        with self.lock:
+            for band in bands(signature):
+                self.buckets.setdefault(band, {})[(signature, comment_id)] = expires
+
+    def discard(self, signature, comment_id):
+        with self.lock:
+            for band in bands(signature):
+                self.buckets.get(band, {}).pop((signature, comment_id), None)
+
+    def candidates(self, signature):
+        now = time.time()
+        found = set()
+        with self.lock:
+            for band in bands(signature):
+                bucket = self.buckets.get(band)
+                if not bucket:
+                    continue
+                for key, expires in list(bucket.items()):
+                    if expires < now:
+                        del bucket[key]
+                    else:
+                        found.add(key)
+        return found
+
+
+class RedisIndex:
+    """
+    Index shared by all web and worker processes.
+
+    Each band bucket is a sorted set of "signature:comment_id" members scored
+    by expiry time; expired members are trimmed on write and ignored on read.
+    """
+
+    prefix = 'neardup'
+
+    def _key(self, band):
+        return f"{self.prefix}:{band[0]}:{band[1]:04x}"
+
+    def add(self, signature, comment_id, ttl):
+        now = time.time()
+        member = f"{signature}:{comment_id}"
+        pipe = get_redis().pipeline(transaction=False)
+        for band in bands(signature):
+            key = self._key(band)
+            pipe.zadd(key, {member: now + ttl})
+            pipe.zremrangebyscore(key, '-inf', now)
+            pipe.expire(key, int(ttl))
+        pipe.execute()
+
+    def discard(self, signature, comment_id):
+        member = f"{signature}:{comment_id}"
+        pipe = get_redis().pipeline(transaction=False)
+        for band in bands(signature):
+            pipe.zrem(self._key(band), member)
+        pipe.execute()
+
+    def candidates(self, signature):
+        pipe = get_redis().pipeline(transaction=False)
+        for band in bands(signature):
+            pipe.zrangebyscore(self._key(band), time.time(), '+inf')
+        found = set()
+        for members in pipe.execute():
+            for member in members:
+                sig, comment_id = member.decode().split(':', 1)
+                found.add((int(sig), comment_id))
+        return found
+
+
+_memory_index = MemoryIndex()
+
+
+def get_index():
+    if settings.NEAR_DUPLICATE_BACKEND == 'redis':
+        return RedisIndex()
+    return _memory_index
+
+
+def find_near_duplicate(text, exclude_id=None):
+    """
+    Look up a recently flagged or rejected comment similar to `text`.
+
+    Returns:
+        tuple: (comment_id, distance) of the closest match, or None
+    """
+    if not settings.NEAR_DUPLICATE_ENABLED:
+        return None
+    signature = simhash(text)
+    if signature is None:
+        return None
+
+    try:
+        candidates = get_index().candidates(signature)
+    except Exception as e:
+        logger.error(f"Near-duplicate lookup failed: {e}")
+        return None
+
+    best = None
+    for candidate, comment_id in candidates:
+        if comment_id == str(exclude_id):
+            continue
+        distance = hamming(signature, candidate)
+        if distance <= settings.NEAR_DUPLICATE_MAX_DISTANCE and (best is None or distance < best[1]):
+            best = (comment_id, distance)
+    return best
+
+
+def remember(comment):
+    """Add a flagged or rejected comment to the index."""
+    if not settings.NEAR_DUPLICATE_ENABLED:
+        return
+    signature = simhash(comment.content)
+    if signature is None:
+        return
+    try:
+        get_index().add(signature, str(comment.id), settings.NEAR_DUPLICATE_TTL)
+    except Exception as e:
+        logger.error(f"Failed to index comment {comment.id} for near-duplicate detection: {e}")
+
+
+def forget(comment):
+    """Remove a comment from the index, e.g. after an admin approves it."""
+    if not settings.NEAR_DUPLICATE_ENABLED:
+        return
+    signature = simhash(comment.content)
+    if signature is None:
+        return
+    try:
+        get_index().discard(signature, str(comment.id))
+    except Exception as e:
+        logger.error(f"Failed to remove comment {comment.id} from near-duplicate index: {e}")
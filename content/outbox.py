@@ -0,0 +1,78 @@
+from config.celery import app as celery_app
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+import logging
+import time
+from .models import OutboxMessage
+from .tracing import current_traceparent
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_task(task, *args, **kwargs):
+    """
+    Record a Celery task in the outbox instead of publishing it.
+
+    Must be called inside the transaction that writes the rows the task
+    depends on; the task is only published once that transaction commits
+    and the relay picks it up. The active trace context is stored with the
+    message and sent as a task header.
+    """
+    headers = {}
+    traceparent = current_traceparent()
+    if traceparent:
+        headers['traceparent'] = traceparent
+
+    return OutboxMessage.objects.create(
+        task_name=task.name,
+        args=list(args),
+        kwargs=kwargs,
+        headers=headers,
+    )
+
+
+def relay_batch(batch_size=100, older_than=None):
+    """
+    Publish up to `batch_size` pending outbox rows to Celery.
+
+    Rows are locked with SKIP LOCKED so several relays can run side by side.
+    Published rows are deleted in the same transaction; if publishing fails
+    the row stays in the outbox and is retried on the next pass, so delivery
+    is at-least-once. `older_than` (seconds) restricts the pass to rows a
+    regular relay should already have published.
+
+    Returns:
+        int: Number of messages published
+    """
+    published = 0
+    with transaction.atomic():
+        pending = OutboxMessage.objects.select_for_update(skip_locked=True)
+        if older_than is not None:
+            pending = pending.filter(created_at__lt=timezone.now() - timedelta(seconds=older_than))
+        messages = list(pending.order_by('created_at')[:batch_size])
+        sent_ids = []
+        failed_ids = []
+        for message in messages:
+            try:
+                celery_app.send_task(
+                    message.task_name,
+                    args=message.args,
+                    kwargs=message.kwargs,
+                    headers={**message.headers, 'published_at': time.time()},
+                )
+            except Exception as e:
+                logger.error(f"Failed to publish outbox message {message.id} ({message.task_name}): {e}")
+                failed_ids.append(message.id)
+                # The broker is most likely down; leave the rest for the next pass
+                break
+            sent_ids.append(message.id)
+            published += 1
+
+        if sent_ids:
+            OutboxMessage.objects.filter(id__in=sent_ids).delete()
+        if failed_ids:
+            OutboxMessage.objects.filter(id__in=failed_ids).update(attempts=F('attempts') + 1)
+
+    return published
@@ -0,0 +1,56 @@
+from django.conf import settings
+import numpy as np
+
+
+class ModerationPolicy:
+    """
+    Per-category flag thresholds.
+
+    A comment is flagged when any category's confidence is strictly above
+    its threshold; categories without an explicit threshold use `default`.
+    """
+
+    def __init__(self, thresholds):
+        thresholds = dict(thresholds)
+        self.default = float(thresholds.pop('default', 0.6))
+        self.thresholds = {name: float(value) for name, value in thresholds.items()}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.MODERATION_POLICY)
+
+    def threshold(self, category_name):
+        return self.thresholds.get(category_name, self.default)
+
+    def flagged_category(self, categories):
+        """Return the first category above its threshold, or None."""
+        for category in categories:
+            if category.get('confidence', 0) > self.threshold(category.get('name')):
+                return category
+        return None
+
+    def evaluate_batch(self, responses):
+        """
+        Vectorized verdicts for many stored moderateText responses.
+
+        Confidences are laid out in a (comments x categories) matrix and
+        compared against the per-category threshold row in one operation.
+
+        Returns:
+            numpy.ndarray: boolean flagged mask, one entry per response
+        """
+        columns = {}
+        cells = []
+        for row, response in enumerate(responses):
+            for category in (response or {}).get('moderationCategories', []):
+                column = columns.setdefault(category.get('name'), len(columns))
+                cells.append((row, column, category.get('confidence', 0)))
+
+        if not cells:
+            return np.zeros(len(responses), dtype=bool)
+
+        rows, cols, values = zip(*cells)
+        confidences = np.zeros((len(responses), len(columns)))
+        confidences[rows, cols] = values
+        thresholds = np.array([self.threshold(name) for name in columns])
+        return (confidences > thresholds).any(axis=1)
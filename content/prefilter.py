@@ -0,0 +1,129 @@
+from django.conf import settings
+import logging
+import numpy as np
+import os
+import re
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Local pre-filter for clearly clean comments: hashed word n-grams fed to a
+# logistic regression model, evaluated with vectorized NumPy. Features are
+# kept sparse as (row, column) index arrays so a batch of any size is scored
+# with a single gather and bincount.
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def _hash(token, n_features):
+    # crc32 is stable across processes, unlike the built-in hash()
+    return zlib.crc32(token.encode('utf-8')) & (n_features - 1)
+
+
+def extract_features(texts, n_features):
+    """
+    Hash unigrams and bigrams of each text into `n_features` buckets.
+
+    Returns:
+        tuple: (rows, cols) int arrays, one entry per n-gram occurrence
+    """
+    rows = []
+    cols = []
+    for i, text in enumerate(texts):
+        tokens = TOKEN_RE.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        rows.extend([i] * len(grams))
+        cols.extend(_hash(gram, n_features) for gram in grams)
+    return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class PrefilterModel:
+    def __init__(self, weights, bias, threshold):
+        self.weights = weights
+        self.bias = float(bias)
+        self.threshold = float(threshold)
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    def predict_proba(self, texts):
+        """Probability that each text would be flagged, for a whole batch."""
+        rows, cols = extract_features(texts, self.n_features)
+        logits = np.bincount(rows, weights=self.weights[cols], minlength=len(texts)) + self.bias
+        return _sigmoid(logits)
+
+    def is_clean(self, texts):
+        """Boolean mask of texts scoring below the auto-approve threshold."""
+        return self.predict_proba(texts) < self.threshold
+
+    @classmethod
+    def train(cls, texts, labels, n_features=2 ** 18, epochs=200, learning_rate=0.5, l2=1e-6):
+        """Fit with full-batch gradient descent on the sparse hashed features."""
+        labels = np.asarray(labels, dtype=np.float64)
+        rows, cols = extract_features(texts, n_features)
+        weights = np.zeros(n_features)
+        bias = float(np.log((labels.mean() + 1e-6) / (1 - labels.mean() + 1e-6)))
+        n = len(texts)
+
+        for _ in range(epochs):
+            logits = np.bincount(rows, weights=weights[cols], minlength=n) + bias
+            error = _sigmoid(logits) - labels
+            gradient = np.bincount(cols, weights=error[rows], minlength=n_features) / n
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * error.mean()
+
+        return cls(weights, bias, threshold=0.0)
+
+    def calibrate(self, texts, labels, max_miss_rate):
+        """
+        Pick the auto-approve threshold conservatively: at most
+        `max_miss_rate` of the flagged examples may score below it.
+        """
+        scores = self.predict_proba(texts)
+        flagged_scores = scores[np.asarray(labels, dtype=bool)]
+        if len(flagged_scores) == 0:
+            self.threshold = 0.0
+        else:
+            self.threshold = float(np.quantile(flagged_scores, max_miss_rate, method='lower'))
+        return self.threshold
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, weights=self.weights, bias=self.bias, threshold=self.threshold)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['weights'], data['bias'], data['threshold'])
+
+
+_cached_model = None
+_cached_mtime = None
+
+
+def get_model():
+    """
+    Return the trained model, reloading it when the file changes.
+
+    Returns None when the pre-filter is disabled or no model has been trained.
+    """
+    global _cached_model, _cached_mtime
+    path = settings.PREFILTER_MODEL_PATH
+    if not settings.PREFILTER_ENABLED or not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    if _cached_model is None or mtime != _cached_mtime:
+        try:
+            _cached_model = PrefilterModel.load(path)
+            _cached_mtime = mtime
+        except Exception as e:
+            logger.error(f"Failed to load pre-filter model from {path}: {e}")
+            return None
+    return _cached_model
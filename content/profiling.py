@@ -0,0 +1,237 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from contextvars import ContextVar
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Query count and total SQL time of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# The request being profiled. Context variables follow the request into
+# sync_to_async threads and async ORM calls, so queries are attributed to
+# the right request under both WSGI and ASGI.
+_query_timer = ContextVar('query_timer', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - start
+        timer.count += 1
+
+
+def _install_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class SerializationTimer:
+    """Time and queries spent in DRF serializer to_representation()."""
+
+    def __init__(self, query_timer):
+        self.query_timer = query_timer
+        self.duration = 0.0
+        self.count = 0
+        self.depth = 0
+
+
+_serialization_timer = ContextVar('serialization_timer', default=None)
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin reporting to_representation() time to the profiler.
+
+    Serializer output is built (and lazy relations are loaded, which is
+    where N+1 queries show up) when the view reads `serializer.data`, so
+    without this it would count as view time. Only the outermost call is
+    timed, so nested and many=True serializers are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        timer = _serialization_timer.get()
+        if timer is None or timer.depth:
+            return super().to_representation(instance)
+
+        timer.depth = 1
+        queries = timer.query_timer.count
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timer.duration += time.perf_counter() - start
+            timer.count += timer.query_timer.count - queries
+            timer.depth = 0
+
+
+class RequestProfilingMiddleware:
+    """
+    Per-request query count, SQL time, render time and wall time.
+
+    Timings are returned in a `Server-Timing` header and requests slower than
+    REQUEST_SLOW_THRESHOLD_MS are written to the `content.profiling` logger as
+    one JSON object per line. Works under WSGI and ASGI: queries are recorded
+    by an execute wrapper on every database connection and attributed to the
+    request through a context variable, whichever thread runs them.
+
+    A full cProfile capture is taken when the request carries `X-Profile: 1`
+    from an admin, or is picked by REQUEST_PROFILE_SAMPLE_RATE; the `.prof`
+    file is written to REQUEST_PROFILE_DIR. Captures are WSGI-only: under
+    ASGI a profiler would see every request sharing the event loop.
+
+    The middleware removes itself at startup unless REQUEST_PROFILING_ENABLED
+    is set, so it costs nothing when disabled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_threshold = settings.REQUEST_SLOW_THRESHOLD_MS / 1000
+        self.profile_sample_rate = settings.REQUEST_PROFILE_SAMPLE_RATE
+        self.profile_dir = settings.REQUEST_PROFILE_DIR
+
+        # New connections get the wrapper as they open; cover any already open
+        connection_created.connect(_install_query_recorder, dispatch_uid='content.profiling')
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(connection)
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profiler = cProfile.Profile() if self._should_profile(request) else None
+        timers = _RequestTimers(request)
+        if profiler:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            timers.stop()
+
+        self._report(request, response, timers)
+        if profiler:
+            self._dump_profile(profiler, request)
+        return response
+
+    async def __acall__(self, request):
+        timers = _RequestTimers(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timers.stop()
+
+        self._report(request, response, timers)
+        return response
+
+    def _report(self, request, response, timers):
+        queries, serialization = timers.queries, timers.serialization
+        response['Server-Timing'] = ", ".join([
+            f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+            f'serialize;dur={serialization.duration * 1000:.1f};desc="{serialization.count} queries"',
+            f'render;dur={request._render_time * 1000:.1f}',
+            f'total;dur={timers.wall * 1000:.1f}',
+        ])
+
+        if timers.wall >= self.slow_threshold:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'route': _route_name(request),
+                'status': response.status_code,
+                'wall_ms': round(timers.wall * 1000, 1),
+                'db_ms': round(queries.duration * 1000, 1),
+                'queries': queries.count,
+                'serialize_ms': round(serialization.duration * 1000, 1),
+                'serialize_queries': serialization.count,
+                'render_ms': round(request._render_time * 1000, 1),
+            }))
+
+    def process_template_response(self, request, response):
+        # DRF Responses are rendered (encoded to JSON) after the view
+        # returns; time that step separately from the view itself
+        start = time.perf_counter()
+
+        def record_render_time(rendered):
+            request._render_time = time.perf_counter() - start
+
+        response.add_post_render_callback(record_render_time)
+        return response
+
+    def _should_profile(self, request):
+        if request.headers.get('X-Profile') == '1':
+            return _is_admin_request(request)
+        return self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+
+    def _dump_profile(self, profiler, request):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        filename = f"{int(time.time() * 1000)}-{request.method}-{_route_name(request)}.prof"
+        path = os.path.join(self.profile_dir, filename)
+        profiler.dump_stats(path)
+        logger.info(f"Request profile written to {path}")
+
+
+class _RequestTimers:
+    """Starts timing a request and makes it the current one until stop()."""
+
+    def __init__(self, request):
+        request._render_time = 0.0
+        self.queries = QueryTimer()
+        self.serialization = SerializationTimer(self.queries)
+        self.tokens = (_query_timer.set(self.queries), _serialization_timer.set(self.serialization))
+        self.start = time.perf_counter()
+        self.wall = None
+
+    def stop(self):
+        self.wall = time.perf_counter() - self.start
+        _query_timer.reset(self.tokens[0])
+        _serialization_timer.reset(self.tokens[1])
+
+
+def _route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name or match.view_name) if match else 'unmatched'
+
+
+def _is_admin_request(request):
+    """
+    Authenticate the JWT on the request and check for the admin role.
+
+    Authentication normally happens inside the DRF view, after middleware,
+    so it is done here only for requests that ask to be profiled.
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return bool(result) and getattr(result[0], 'role', None) == 'admin'
@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.http import JsonResponse
+from functools import wraps
+import json
+import logging
+import math
+import time
+import uuid
+from . import metrics
+from .db_router import jwt_user_id
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Sliding-window log over one sorted set per (endpoint, scope, identity).
+# All windows for a request are checked first and the request is only
+# recorded when every one has room, so a rejected attempt does not use up
+# quota. Returns {0, 0} when allowed, otherwise {retry_after_ms, key index}.
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local worst, worst_index = 0, 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + i * 2])
+    local window = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local retry = tonumber(oldest[2]) + window - now
+        if retry > worst then
+            worst, worst_index = retry, i
+        end
+    end
+end
+if worst > 0 then
+    return {worst, worst_index}
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, tonumber(ARGV[2 + i * 2]))
+end
+return {0, 0}
+"""
+
+_script = None
+
+
+def parse_rate(rate):
+    """'10/60' -> (10 requests, 60 seconds)."""
+    count, seconds = rate.split('/')
+    return int(count), float(seconds)
+
+
+def client_ip(request):
+    if settings.RATE_LIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _body_username(request):
+    try:
+        if request.content_type == 'application/json':
+            username = json.loads(request.body or b'{}').get('username')
+        else:
+            username = request.POST.get('username')
+    except (ValueError, AttributeError):
+        return None
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+def _username_and_ip(request):
+    # Keyed on (username, ip) rather than the username alone, so guessing
+    # from one address cannot lock the account's owner out everywhere
+    username = _body_username(request)
+    return f"{username}@{client_ip(request)}" if username else None
+
+
+# Scope -> identity of the caller for that scope (None skips the scope).
+# None of these touch the database.
+SCOPES = {
+    'user': jwt_user_id,
+    'ip': client_ip,
+    'username': _body_username,
+    'username_ip': _username_and_ip,
+}
+
+
+def check(endpoint, request):
+    """
+    Record an attempt against every configured window for `endpoint`.
+
+    Returns (retry_after_seconds, scope) when a window is full, otherwise
+    None. Fails open when Redis is unavailable.
+    """
+    keys, args = [], []
+    scopes = []
+    for scope, rate in settings.RATE_LIMITS.get(endpoint, {}).items():
+        identity = SCOPES[scope](request)
+        if not identity:
+            continue
+        limit, seconds = parse_rate(rate)
+        keys.append(f"ratelimit:{endpoint}:{scope}:{identity}")
+        args.extend([limit, int(seconds * 1000)])
+        scopes.append(scope)
+    if not keys:
+        return None
+
+    global _script
+    try:
+        if _script is None:
+            _script = get_redis().register_script(SLIDING_WINDOW_LUA)
+        now_ms = int(time.time() * 1000)
+        retry_ms, index = _script(keys=keys, args=[now_ms, f"{now_ms}-{uuid.uuid4().hex[:8]}", *args])
+    except Exception as e:
+        logger.warning(f"Rate limit check for {endpoint} failed, allowing request: {e}")
+        return None
+
+    if not retry_ms:
+        return None
+    return math.ceil(int(retry_ms) / 1000), scopes[int(index) - 1]
+
+
+def rate_limit(endpoint):
+    """
+    Throttle a view with the windows configured in RATE_LIMITS[endpoint].
+
+    Apply it outside `@api_view` so it runs before DRF authentication (a
+    user lookup) and before the view body, keeping rejected requests free
+    of database and password-hashing work.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED:
+                rejected = check(endpoint, request)
+                if rejected:
+                    retry_after, scope = rejected
+                    metrics.RATE_LIMITED.labels(endpoint=endpoint, scope=scope).inc()
+                    response = JsonResponse({"error": "Too many requests", "retry_after": retry_after}, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
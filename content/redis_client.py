@@ -0,0 +1,38 @@
+from django.conf import settings
+import redis
+import time
+
+_client = None
+
+
+class FailFastRedis(redis.Redis):
+    """
+    Redis client that stops trying for a while after Redis stops answering.
+
+    Callers already treat Redis errors as "unavailable" and fall back; this
+    makes those fallbacks immediate instead of each call waiting out its own
+    timeout while Redis is down. Pipelines are not covered.
+    """
+
+    down_until = 0.0
+
+    def execute_command(self, *args, **options):
+        if time.monotonic() < self.down_until:
+            raise redis.ConnectionError("Redis marked unavailable after a recent failure")
+        try:
+            return super().execute_command(*args, **options)
+        except (redis.ConnectionError, redis.TimeoutError):
+            self.down_until = time.monotonic() + settings.REDIS_DOWN_BACKOFF_SECONDS
+            raise
+
+
+def get_redis():
+    """Shared Redis client for application data (caches, indexes, limits)."""
+    global _client
+    if _client is None:
+        _client = FailFastRedis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
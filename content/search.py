@@ -0,0 +1,157 @@
+from django.db import connections, router
+import base64
+import binascii
+import json
+import re
+from .models import Comment, Post
+
+# Full-text search over posts and APPROVED comments.
+#
+# PostgreSQL: `search_vector` tsvector columns with GIN indexes, ranked by
+# ts_rank. SQLite (local development): FTS5 tables posts_fts / comments_fts,
+# ranked by bm25. Both are kept current by triggers (migration 0010), so
+# status transitions done with queryset .update() are picked up too.
+#
+# Results are ordered by (score DESC, id) and paginated with a keyset cursor
+# on that pair.
+
+TEXT_SEARCH_CONFIG = 'english'
+
+KINDS = {
+    'posts': Post,
+    'comments': Comment,
+}
+
+POSTGRES_QUERY = """
+    SELECT t.id, ts_rank(t.search_vector, q)::float8 AS score
+    FROM {table} t, websearch_to_tsquery('{config}', %s) q
+    WHERE t.search_vector @@ q {status}
+    {after}
+    ORDER BY score DESC, t.id
+    LIMIT %s
+"""
+POSTGRES_AFTER = "AND (ts_rank(t.search_vector, q)::float8 < %s OR (ts_rank(t.search_vector, q)::float8 = %s AND t.id > %s))"
+
+# bm25() is lower-is-better; negate it so both backends sort score DESC.
+# Post titles weigh twice as much as bodies.
+SQLITE_QUERY = """
+    SELECT t.id, -bm25({fts}{weights}) AS score
+    FROM {fts} JOIN {table} t ON t.rowid = {fts}.rowid
+    WHERE {fts} MATCH %s {status}
+    {after}
+    ORDER BY score DESC, t.id
+    LIMIT %s
+"""
+SQLITE_AFTER = "AND (score < %s OR (score = %s AND t.id > %s))"
+
+
+class SearchCursorError(ValueError):
+    pass
+
+
+def search(kind, query, limit=20, cursor=None):
+    """
+    Ranked matches for `query`.
+
+    Returns:
+        tuple: (list of model instances with a `search_rank` attribute,
+        cursor for the next page or None)
+    """
+    model = KINDS[kind]
+    after = decode_cursor(cursor) if cursor else None
+    using = router.db_for_read(model)
+    connection = connections[using]
+
+    if connection.vendor == 'postgresql':
+        rows = _postgres_matches(connection, model, query, after, limit + 1)
+    else:
+        rows = _sqlite_matches(connection, model, query, after, limit + 1)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    objects = model.objects.using(using).select_related('author').in_bulk([row[0] for row in rows])
+
+    results = []
+    for object_id, score in rows:
+        obj = objects.get(model._meta.pk.to_python(object_id))
+        if obj is not None:
+            obj.search_rank = score
+            results.append(obj)
+
+    next_cursor = encode_cursor(*rows[-1]) if has_more else None
+    return results, next_cursor
+
+
+def _status_clause(model):
+    return "AND t.status = 'APPROVED'" if model is Comment else ""
+
+
+def _postgres_matches(connection, model, query, after, limit):
+    sql = POSTGRES_QUERY.format(
+        table=model._meta.db_table,
+        config=TEXT_SEARCH_CONFIG,
+        status=_status_clause(model),
+        after=POSTGRES_AFTER if after else "",
+    )
+    params = [query] + ([after[0], after[0], after[1]] if after else []) + [limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(str(object_id), score) for object_id, score in cursor.fetchall()]
+
+
+def _sqlite_matches(connection, model, query, after, limit):
+    match = fts5_query(query)
+    if not match:
+        return []
+    sql = SQLITE_QUERY.format(
+        fts=f"{model._meta.db_table}_fts",
+        weights=", 2.0, 1.0" if model is Post else "",
+        table=model._meta.db_table,
+        status=_status_clause(model),
+        after=SQLITE_AFTER if after else "",
+    )
+    params = [match] + ([after[0], after[0], after[1]] if after else []) + [limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def fts5_query(query):
+    """User input as an FTS5 query matching all of its words (no operators)."""
+    words = re.findall(r'\w+', query)
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def encode_cursor(object_id, score):
+    return base64.urlsafe_b64encode(json.dumps([score, str(object_id)]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, object_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(object_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise SearchCursorError("invalid cursor")
+
+
+def rebuild(using='default'):
+    """
+    Recompute every search entry from the source tables.
+
+    Triggers keep the index current; this is for recovery, e.g. after a
+    SQLite VACUUM renumbers the rowids the FTS tables are keyed on.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # No-op updates of the watched columns fire the triggers
+            cursor.execute("UPDATE posts SET title = title")
+            cursor.execute("UPDATE comments SET status = status")
+        else:
+            cursor.execute("DELETE FROM posts_fts")
+            cursor.execute("INSERT INTO posts_fts(rowid, title, content) SELECT rowid, title, content FROM posts")
+            cursor.execute("DELETE FROM comments_fts")
+            cursor.execute(
+                "INSERT INTO comments_fts(rowid, content) "
+                "SELECT rowid, content FROM comments WHERE status = 'APPROVED'"
+            )
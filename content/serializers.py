@@ -1,8 +1,9 @@
 
 from rest_framework import serializers
 from .models import User, Post, Comment, Notification
+from .profiling import TimedSerializerMixin
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -20,14 +21,16 @@ class UserCreateSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
+    comment_count = serializers.ReadOnlyField(source='approved_comment_count')
+    last_activity_at = serializers.ReadOnlyField()
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'author', 'created_at']
+        fields = ['id', 'title', 'content', 'author', 'comment_count', 'last_activity_at', 'created_at']
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
     status = serializers.ReadOnlyField()
 
@@ -36,7 +39,23 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'post', 'author', 'content', 'status', 'created_at']
         read_only_fields = ['post']
 
-class NotificationSerializer(serializers.ModelSerializer):
+class FeedCommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    author = serializers.ReadOnlyField(source='author.username')
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'author', 'content', 'created_at']
+
+class FeedPostSerializer(PostSerializer):
+    # Filled by the feed view's window-function prefetch
+    latest_comments = FeedCommentSerializer(many=True, read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['latest_comments']
+
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    message = serializers.CharField(source='display_message', read_only=True)
+
     class Meta:
         model = Notification
-        fields = ['id', 'message', 'is_read', 'created_at']
+        fields = ['id', 'message', 'kind', 'count', 'is_read', 'created_at', 'updated_at']
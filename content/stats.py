@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+import logging
+from .models import ModerationStatsHour
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = [
+    'comments_submitted', 'auto_approved', 'auto_flagged', 'fallback_decisions',
+    'admin_approved', 'admin_rejected', 'admin_flagged_reviews', 'admin_review_seconds',
+]
+
+
+def hour_bucket(moment=None):
+    return (moment or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def record(moment=None, **increments):
+    """
+    Add `increments` to the counters of the hour containing `moment`.
+
+    The row is created on first use and then updated with F() expressions,
+    so concurrent writers never lose increments. Inside a transaction the
+    update waits until it commits: every writer updates the same hourly row,
+    and holding its lock for the rest of a request's transaction would
+    serialize them (rolled-back work is not counted either). Failures are
+    logged rather than raised; statistics must not break the request or task.
+    """
+    bucket = hour_bucket(moment)
+    transaction.on_commit(lambda: _apply(bucket, increments))
+
+
+def _apply(bucket, increments):
+    updates = {field: F(field) + value for field, value in increments.items()}
+    try:
+        with transaction.atomic():
+            if not ModerationStatsHour.objects.filter(bucket_start=bucket).update(**updates):
+                ModerationStatsHour.objects.bulk_create(
+                    [ModerationStatsHour(bucket_start=bucket)], ignore_conflicts=True
+                )
+                ModerationStatsHour.objects.filter(bucket_start=bucket).update(**updates)
+    except Exception as e:
+        logger.error(f"Failed to record moderation stats {increments}: {e}")
+
+
+def retract(moment=None, **decrements):
+    """
+    Take back counts recorded earlier in the hour containing `moment`.
+
+    Only an existing row whose counters still cover the decrement is
+    updated, so a missing or pruned hour is left alone instead of going
+    negative. Deferred until commit like record().
+    """
+    bucket = hour_bucket(moment)
+    transaction.on_commit(lambda: _apply_retraction(bucket, decrements))
+
+
+def _apply_retraction(bucket, decrements):
+    try:
+        ModerationStatsHour.objects.filter(
+            bucket_start=bucket, **{f'{field}__gte': value for field, value in decrements.items()}
+        ).update(**{field: F(field) - value for field, value in decrements.items()})
+    except Exception as e:
+        logger.error(f"Failed to retract moderation stats {decrements}: {e}")
+
+
+def summarize(since, until=None, granularity='hour'):
+    """
+    Counters per hour or day between `since` and `until`, plus totals.
+
+    Reads only the rollup table: at most 24 rows per day of range.
+    """
+    queryset = ModerationStatsHour.objects.filter(bucket_start__gte=hour_bucket(since))
+    if until:
+        queryset = queryset.filter(bucket_start__lt=until)
+
+    if granularity == 'day':
+        rows = (
+            queryset.annotate(bucket=TruncDay('bucket_start'))
+            .values('bucket')
+            .annotate(**{field: Sum(field) for field in COUNTER_FIELDS})
+            .order_by('bucket')
+        )
+    else:
+        rows = queryset.annotate(bucket=F('bucket_start')).values('bucket', *COUNTER_FIELDS).order_by('bucket')
+
+    buckets = [_with_rates(dict(row)) for row in rows]
+    totals = {field: sum(row[field] or 0 for row in buckets) for field in COUNTER_FIELDS}
+    return {'buckets': buckets, 'totals': _with_rates(totals)}
+
+
+def _with_rates(row):
+    decided = (row['auto_approved'] or 0) + (row['auto_flagged'] or 0)
+    reviewed = (row['admin_approved'] or 0) + (row['admin_rejected'] or 0)
+    row['flag_rate'] = row['auto_flagged'] / decided if decided else None
+    row['fallback_rate'] = row['fallback_decisions'] / decided if decided else None
+    row['reject_rate'] = row['admin_rejected'] / reviewed if reviewed else None
+    flagged_reviews = row['admin_flagged_reviews'] or 0
+    row['avg_admin_review_seconds'] = row['admin_review_seconds'] / flagged_reviews if flagged_reviews else None
+    return row
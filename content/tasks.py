@@ -1,12 +1,21 @@
 
 from celery import shared_task
+from celery.exceptions import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 import requests
+import contextvars
 import logging
 import os
+import random
+import re
+import time
 from .models import Comment, Notification, Post
+from . import metrics, nearduplicate, prefilter, stats, tracing, trust
+from .policy import ModerationPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -72,29 +81,37 @@ def get_google_cloud_token():
     logger.error("No Google Cloud authentication credentials configured")
     return None
 
-@shared_task
-def moderate_comment_task(comment_id):
-    """
-    Moderate a comment using Google Cloud Natural Language API.
-    Falls back to keyword-based moderation if API is unavailable.
-    """
-    try:
-        comment = Comment.objects.get(id=comment_id)
-    except Comment.DoesNotExist:
-        logger.error(f"Comment {comment_id} not found")
-        return
+MODERATE_TEXT_URL = "https://language.googleapis.com/v1/documents:moderateText"
+FALLBACK_KEYWORDS = ["bad", "flag", "hate", "kill", "stupid", "idiot", "attack"]
+# Metric label for each decision source
+DECISION_SOURCE_LABELS = {
+    "Google Cloud API": 'api',
+    "Mock Moderation": 'fallback',
+    "Local Pre-filter": 'prefilter',
+    "Near-duplicate Index": 'near_duplicate',
+    "Trusted Author": 'trusted',
+    "Trusted Author Audit": 'trusted_audit',
+}
 
-    logger.info(f"Starting moderation for comment {comment_id}")
+# Only flags confirmed by the moderation API (directly or as a trusted-author
+# audit) seed the near-duplicate index; admin rejections seed it from the
+# admin view. Index matches and fallback guesses would otherwise feed back
+# into it and snowball false positives.
+NEAR_DUPLICATE_SEED_SOURCES = frozenset({"Google Cloud API", "Trusted Author Audit"})
 
-    # Get authentication token
-    auth_token = get_google_cloud_token()
 
-    if not auth_token:
-        logger.error("No authentication token available, skipping to mock fallback")
-        raise Exception("Google Cloud API credentials not configured")
+class TransientModerationError(Exception):
+    """Moderation API failure that is worth retrying (timeouts, 429, 5xx)."""
+
+
+def call_moderation_api(content, auth_token):
+    """
+    Send one moderateText request.
 
-    # Prepare API request
-    url = "https://language.googleapis.com/v1/documents:moderateText"
+    Raises:
+        TransientModerationError: for network errors, 429 and 5xx responses
+        requests.HTTPError: for any other non-2xx response
+    """
     headers = {
         "Authorization": f"Bearer {auth_token}",
         "Content-Type": "application/json",
@@ -102,111 +119,514 @@ def moderate_comment_task(comment_id):
     data = {
         "document": {
             "type": "PLAIN_TEXT",
-            "content": comment.content
+            "content": content
         }
     }
 
+    start = time.perf_counter()
     try:
-        logger.debug(f"Calling Google Cloud API for comment {comment_id}")
-        response = requests.post(url, headers=headers, json=data, timeout=10)
-        response.raise_for_status()
-        result = response.json()
+        response = requests.post(MODERATE_TEXT_URL, headers=headers, json=data, timeout=10)
+    except requests.Timeout as e:
+        metrics.MODERATION_API_ERRORS.labels(code='timeout').inc()
+        raise TransientModerationError(str(e)) from e
+    except requests.ConnectionError as e:
+        metrics.MODERATION_API_ERRORS.labels(code='connection').inc()
+        raise TransientModerationError(str(e)) from e
+    finally:
+        metrics.MODERATION_API_LATENCY.observe(time.perf_counter() - start)
 
-        logger.info(f"Successfully received moderation result for comment {comment_id}")
+    if response.status_code >= 400:
+        metrics.MODERATION_API_ERRORS.labels(code=str(response.status_code)).inc()
+    if response.status_code == 429 or response.status_code >= 500:
+        raise TransientModerationError(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    return response.json()
 
-        # Store raw API response for audit trail
-        comment.moderation_response = result
 
-        # Check moderation categories
-        flagged = False
-        categories = result.get('moderationCategories', [])
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
 
-        logger.debug(f"Moderation categories for comment {comment_id}: {categories}")
 
-        for category in categories:
-            # Common toxic categories: Toxic, Insult, Profanity, etc.
-            # We flag if any category has high confidence (>60%)
-            confidence = category.get('confidence', 0)
-            if confidence > 0.6:
-                flagged = True
-                logger.warning(f"Comment {comment_id} flagged: {category.get('name')} (confidence: {confidence})")
+def split_text(content, max_chars):
+    """
+    Split text into chunks of at most `max_chars`, preferring sentence
+    boundaries and falling back to whitespace (or a hard cut) for
+    sentences that are longer than a chunk.
+
+    Returns:
+        list: (offset, chunk) tuples covering the whole text
+    """
+    if len(content) <= max_chars:
+        return [(0, content)]
+
+    chunks = []
+    start = 0
+    while start < len(content):
+        end = start + max_chars
+        if end >= len(content):
+            chunks.append((start, content[start:]))
+            break
+
+        window = content[start:end]
+        boundaries = [m.end() for m in SENTENCE_END_RE.finditer(window)]
+        if boundaries:
+            cut = boundaries[-1]
+        else:
+            cut = window.rfind(' ') + 1 or max_chars
+        chunks.append((start, content[start:start + cut]))
+        start += cut
+    return chunks
+
+
+def merge_category_scores(results):
+    """Merge moderateText results by taking each category's max confidence."""
+    merged = {}
+    for result in results:
+        for category in result.get('moderationCategories', []):
+            name = category.get('name')
+            if name not in merged or category.get('confidence', 0) > merged[name].get('confidence', 0):
+                merged[name] = category
+    return list(merged.values())
+
+
+def is_flagged(categories):
+    """Return the first category above its MODERATION_POLICY threshold, or None."""
+    return ModerationPolicy.from_settings().flagged_category(categories)
+
+
+def _moderate_chunk(offset, text, auth_token):
+    with tracing.span('moderateText.chunk', offset=offset, length=len(text)):
+        return call_moderation_api(text, auth_token)
+
+
+def moderate_text(content, auth_token):
+    """
+    Moderate text of any length.
+
+    Short texts are sent as a single document. Longer texts are split with
+    `split_text` and the chunks moderated concurrently; as soon as one chunk
+    crosses the flag threshold the chunks that have not started yet are
+    cancelled. Per-category scores are merged by max and the chunk results
+    are kept under `chunks` for auditing.
+    """
+    chunks = split_text(content, settings.MODERATION_CHUNK_CHARS)
+    if len(chunks) == 1:
+        return call_moderation_api(content, auth_token)
+
+    chunk_results = []
+    executor = ThreadPoolExecutor(max_workers=settings.MODERATION_CHUNK_CONCURRENCY)
+    try:
+        futures = {
+            # Each chunk runs in a copy of the current context so its span
+            # nests under the task span
+            executor.submit(contextvars.copy_context().run, _moderate_chunk, offset, text, auth_token): (offset, text)
+            for offset, text in chunks
+        }
+        for future in as_completed(futures):
+            offset, text = futures[future]
+            result = future.result()
+            chunk_results.append({
+                'offset': offset,
+                'length': len(text),
+                'moderationCategories': result.get('moderationCategories', []),
+            })
+            if is_flagged(result.get('moderationCategories', [])):
+                logger.info(f"Chunk at offset {offset} crossed flag threshold, cancelling remaining chunks")
                 break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    chunk_results.sort(key=lambda chunk: chunk['offset'])
+    return {
+        'moderationCategories': merge_category_scores(chunk_results),
+        'chunks': chunk_results,
+        'chunkCount': len(chunks),
+    }
 
-        if not flagged:
-            comment.status = 'APPROVED'
-            comment.save()
 
-            Notification.objects.create(
-                recipient=comment.author,
-                message=f"Your comment on '{comment.post.title}' has been successfully posted."
-            )
-            logger.info(f"Comment {comment_id} APPROVED via Google Cloud API")
-        else:
-            comment.status = 'FLAGGED'
-            comment.save()
+def retry_countdown(retries):
+    """Exponential backoff with full jitter for the given retry number."""
+    base = settings.MODERATION_RETRY_BACKOFF
+    cap = settings.MODERATION_RETRY_BACKOFF_MAX
+    return random.uniform(0, min(cap, base * (2 ** retries)))
+
+
+def claim_comment(comment_id):
+    """
+    Claim a comment for moderation (UNDER_REVIEW -> MODERATING).
+
+    A MODERATING claim older than MODERATION_CLAIM_TIMEOUT is treated as
+    abandoned by a crashed worker and can be taken over.
 
-            # Notify comment author
-            Notification.objects.create(
-                recipient=comment.author,
-                message=f"Your comment on '{comment.post.title}' has been flagged and is under review."
+    Returns:
+        bool: True if this worker now owns the comment
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.MODERATION_CLAIM_TIMEOUT)
+    claimed = Comment.objects.filter(
+        Q(status='UNDER_REVIEW') | Q(status='MODERATING', updated_at__lt=stale_before),
+        id=comment_id,
+    ).update(status='MODERATING', updated_at=timezone.now())
+    return bool(claimed)
+
+
+def release_comment(comment):
+    """Hand a claimed comment back to UNDER_REVIEW so it can be retried."""
+    return comment.transition('MODERATING', 'UNDER_REVIEW')
+
+
+def notify_moderation_decision(comment, flagged, source):
+    """Notify the author, and bump every admin's flagged digest for flagged comments."""
+    if not flagged:
+        Notification.objects.create(
+            recipient=comment.author,
+            message=f"Your comment on '{comment.post.title}' has been successfully posted."
+        )
+        metrics.NOTIFICATIONS_CREATED.labels(kind='author').inc()
+        logger.info(f"Comment {comment.id} APPROVED via {source}")
+        return
+
+    # Notify comment author
+    Notification.objects.create(
+        recipient=comment.author,
+        message=f"Your comment on '{comment.post.title}' has been flagged and is under review."
+    )
+    metrics.NOTIFICATIONS_CREATED.labels(kind='author').inc()
+
+    # Fold into each admin's rolling digest instead of one row per admin per flag
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    admin_ids = list(User.objects.filter(role='admin').values_list('id', flat=True))
+    created = Notification.bump_flagged_digest(admin_ids)
+    metrics.NOTIFICATIONS_CREATED.labels(kind='admin_digest').inc(created)
+
+    logger.critical(f"FLAGGED CONTENT DETECTED ({source}): Comment {comment.id} - {len(admin_ids)} admin digests updated")
+
+
+def apply_moderation_decision(comment, flagged, moderation_response=None, source="Google Cloud API",
+                              stage_timings=None, from_status='MODERATING'):
+    """
+    Record the moderation outcome for a claimed comment and notify users.
+
+    The status change is a compare-and-set from MODERATING (or APPROVED for
+    after-the-fact audits), so a decision is only written (and notifications
+    only sent) by the worker that holds the claim; an admin decision made in
+    the meantime is never overwritten. A flag revokes the author's trust.
+
+    Returns:
+        bool: True if the decision was recorded
+    """
+    fields = {}
+    if moderation_response is not None:
+        fields['moderation_response'] = moderation_response
+    if stage_timings is not None:
+        mark_stage(stage_timings, comment, 'decided')
+        fields['stage_timings'] = stage_timings
+
+    new_status = 'FLAGGED' if flagged else 'APPROVED'
+    if not comment.transition(from_status, new_status, **fields):
+        logger.warning(f"Comment {comment.id} is no longer {from_status}, discarding {new_status} decision")
+        return False
+
+    metrics.observe_decision(comment, DECISION_SOURCE_LABELS.get(source, 'other'))
+    stats.record(
+        **{'auto_flagged' if flagged else 'auto_approved': 1},
+        fallback_decisions=1 if source == "Mock Moderation" else 0,
+    )
+    if from_status == 'APPROVED':
+        # An audit overturned a fast-path approval; take it back out of the
+        # hour it was counted in so approvals plus flags still match decisions
+        stats.retract(moment=comment.created_at, auto_approved=1)
+
+    if flagged:
+        if source in NEAR_DUPLICATE_SEED_SOURCES:
+            nearduplicate.remember(comment)
+        trust.revoke(comment.author_id)
+
+    with tracing.span('notifications', status=new_status):
+        notify_moderation_decision(comment, flagged, source)
+    return True
+
+
+def task_header(request, name):
+    """Read a custom message header (e.g. `traceparent`) from a task request."""
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get(name)
+    return value
+
+
+def mark_stage(stage_timings, comment, stage):
+    """Record `stage` as milliseconds since the comment was created."""
+    stage_timings[stage] = round((timezone.now() - comment.created_at).total_seconds() * 1000)
+
+
+@shared_task(bind=True, max_retries=None)
+def moderate_comment_task(self, comment_id):
+    """
+    Moderate a comment using Google Cloud Natural Language API.
+    Falls back to keyword-based moderation if API is unavailable.
+
+    The task is idempotent: it first claims the comment with a conditional
+    update and exits if the comment was already claimed or decided, so
+    redeliveries and duplicate enqueues never re-call the API. Transient API
+    errors are retried with exponential backoff and jitter before falling
+    back to keyword moderation.
+
+    Runs as a child span of the submitting request (via the `traceparent`
+    task header) and persists per-stage timings on the comment.
+    """
+    with tracing.span(
+        'moderate_comment_task',
+        traceparent=task_header(self.request, 'traceparent'),
+        comment_id=str(comment_id),
+        retries=self.request.retries,
+    ):
+        return _moderate_comment(self, comment_id)
+
+
+def _moderate_comment(task, comment_id):
+    if not claim_comment(comment_id):
+        logger.info(f"Comment {comment_id} already claimed or decided, skipping")
+        return
+
+    try:
+        comment = Comment.objects.select_related('author', 'post').get(id=comment_id)
+    except Comment.DoesNotExist:
+        logger.error(f"Comment {comment_id} not found")
+        return
+
+    logger.info(f"Starting moderation for comment {comment_id}")
+
+    stage_timings = {'attempt': task.request.retries}
+    published_at = task_header(task.request, 'published_at')
+    if published_at:
+        stage_timings['published'] = round((float(published_at) - comment.created_at.timestamp()) * 1000)
+    mark_stage(stage_timings, comment, 'started')
+
+    # Near-duplicates of recently flagged or rejected comments are flagged
+    # without an API call
+    with tracing.span('near_duplicate_lookup'):
+        match = nearduplicate.find_near_duplicate(comment.content, exclude_id=comment.id)
+    if match:
+        matched_id, distance = match
+        logger.warning(f"Comment {comment_id} is a near-duplicate of flagged comment {matched_id} (distance: {distance})")
+        apply_moderation_decision(
+            comment, True,
+            moderation_response={'nearDuplicate': {'comment': matched_id, 'distance': distance}},
+            source="Near-duplicate Index",
+            stage_timings=stage_timings,
+        )
+        return
+
+    # Clearly clean comments are approved locally without an API call
+    model = prefilter.get_model()
+    if model is not None:
+        with tracing.span('prefilter'):
+            score = float(model.predict_proba([comment.content])[0])
+        if score < model.threshold:
+            logger.info(f"Comment {comment_id} scored {score:.4f} < {model.threshold:.4f}, approving locally")
+            apply_moderation_decision(
+                comment, False,
+                moderation_response={'prefilter': {'score': score, 'threshold': model.threshold}},
+                source="Local Pre-filter",
+                stage_timings=stage_timings,
             )
+            return
+
+    # Get authentication token
+    with tracing.span('get_google_cloud_token'):
+        auth_token = get_google_cloud_token()
+    mark_stage(stage_timings, comment, 'token_fetched')
 
-            # Notify all admins
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            admins = User.objects.filter(role='admin')
-            admin_count = 0
-            for admin in admins:
-                Notification.objects.create(
-                    recipient=admin,
-                    message=f"New flagged comment requires review: {comment.id}"
+    if not auth_token:
+        logger.error("No authentication token available, releasing comment for retry")
+        release_comment(comment)
+        raise Exception("Google Cloud API credentials not configured")
+
+    try:
+        logger.debug(f"Calling Google Cloud API for comment {comment_id}")
+        try:
+            with tracing.span('moderateText', content_length=len(comment.content)):
+                result = moderate_text(comment.content, auth_token)
+        except TransientModerationError as e:
+            if task.request.retries < settings.MODERATION_MAX_RETRIES:
+                countdown = retry_countdown(task.request.retries)
+                logger.warning(
+                    f"Transient moderation error for comment {comment_id} ({e}), "
+                    f"retry {task.request.retries + 1}/{settings.MODERATION_MAX_RETRIES} in {countdown:.1f}s"
                 )
-                admin_count += 1
+                release_comment(comment)
+                raise task.retry(exc=e, countdown=countdown)
+            raise
+        finally:
+            mark_stage(stage_timings, comment, 'api_responded')
+
+        logger.info(f"Successfully received moderation result for comment {comment_id}")
+
+        # Check moderation categories against the per-category policy
+        # Common toxic categories: Toxic, Insult, Profanity, etc.
+        categories = result.get('moderationCategories', [])
+
+        logger.debug(f"Moderation categories for comment {comment_id}: {categories}")
+
+        flagged_category = is_flagged(categories)
+        flagged = flagged_category is not None
+        if flagged:
+            logger.warning(
+                f"Comment {comment_id} flagged: {flagged_category.get('name')} "
+                f"(confidence: {flagged_category.get('confidence')})"
+            )
+
+        # Store raw API response for audit trail alongside the decision
+        apply_moderation_decision(comment, flagged, moderation_response=result, stage_timings=stage_timings)
 
-            logger.critical(f"FLAGGED CONTENT DETECTED: Comment {comment_id} - {admin_count} admins notified")
+    except Retry:
+        raise
 
     except Exception as e:
         logger.error(f"Error calling Google Cloud API: {e}")
         logger.warning("FALLBACK: Using Mock Moderation (keyword-based detection)")
 
         # Mock Fallback for testing/unconfigured envs
-        if any(word in comment.content.lower() for word in ["bad", "flag", "hate", "kill", "stupid", "idiot", "attack"]):
-            comment.status = 'FLAGGED'
-            comment.save()
-
-            # Notify comment author
-            Notification.objects.create(
-                recipient=comment.author,
-                message=f"Your comment on '{comment.post.title}' has been flagged and is under review."
-            )
+        with tracing.span('fallback_moderation'):
+            flagged = any(word in comment.content.lower() for word in FALLBACK_KEYWORDS)
+            apply_moderation_decision(comment, flagged, source="Mock Moderation", stage_timings=stage_timings)
 
-            # BUG FIX #2: Notify admins about flagged content (was missing!)
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            admins = User.objects.filter(role='admin')
-            for admin in admins:
-                Notification.objects.create(
-                    recipient=admin,
-                    message=f"New flagged comment requires review: {comment.id} [Mock Moderation]"
-                )
+@shared_task(bind=True, max_retries=None)
+def audit_comment_task(self, comment_id):
+    """
+    After-the-fact moderation of a trusted author's comment.
 
-            # BUG FIX #3: Create alert for operations team
-            logger.critical(f"FLAGGED CONTENT DETECTED (Mock): Comment {comment.id} - Admins notified")
+    The comment was approved on submit; if the API flags it now it moves
+    APPROVED -> FLAGGED (compare-and-set, so an admin decision in between
+    wins), admins are notified and the author loses trust.
+    """
+    with tracing.span('audit_comment_task', comment_id=str(comment_id), attempt=self.request.retries):
+        _audit_comment(self, comment_id)
 
-        else:
-            comment.status = 'APPROVED'
-            comment.save()
-            Notification.objects.create(
-                recipient=comment.author,
-                message=f"Your comment on '{comment.post.title}' has been successfully posted."
-            )
-            logger.info(f"Comment {comment.id} auto-approved via Mock Moderation")
+
+def _audit_comment(task, comment_id):
+    comment = Comment.objects.select_related('author', 'post').filter(id=comment_id, status='APPROVED').first()
+    if comment is None:
+        logger.info(f"Comment {comment_id} no longer approved, skipping audit")
+        return
+
+    auth_token = get_google_cloud_token()
+    if not auth_token:
+        logger.error(f"No authentication token available, skipping audit of comment {comment_id}")
+        return
+
+    try:
+        with tracing.span('moderateText', content_length=len(comment.content)):
+            result = moderate_text(comment.content, auth_token)
+    except TransientModerationError as e:
+        if task.request.retries < settings.MODERATION_MAX_RETRIES:
+            raise task.retry(exc=e, countdown=retry_countdown(task.request.retries))
+        logger.error(f"Giving up audit of comment {comment_id}: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Error auditing comment {comment_id}: {e}")
+        return
+
+    flagged_category = is_flagged(result.get('moderationCategories', []))
+    if flagged_category is None:
+        # Mark the approval as audited so it counts towards the author's trust
+        Comment.objects.filter(id=comment_id, status='APPROVED').update(
+            moderation_response={**result, 'trustedAuthor': True, 'trustedAuthorAudit': True},
+        )
+        logger.info(f"Comment {comment_id} by trusted author passed audit")
+        return
+
+    logger.warning(
+        f"Trusted author's comment {comment_id} flagged on audit: {flagged_category.get('name')} "
+        f"(confidence: {flagged_category.get('confidence')})"
+    )
+    apply_moderation_decision(
+        comment, True,
+        moderation_response={**result, 'trustedAuthorAudit': True},
+        source="Trusted Author Audit",
+        from_status='APPROVED',
+    )
 
 @shared_task
 def delete_rejected_comment_task(comment_id):
-    try:
-        comment = Comment.objects.get(id=comment_id)
-        if comment.status == 'REJECTED':
-            comment.delete()
-    except Comment.DoesNotExist:
-        pass
+    # Conditional delete: a comment re-approved since rejection is kept
+    Comment.objects.filter(id=comment_id, status='REJECTED').delete()
+
+
+# -------------------------
+# STUCK-COMMENT SWEEPER
+# -------------------------
+
+REQUEUED_KEY = 'moderation-requeued:{}'
+
+
+def stuck_comments():
+    """Querysets of comments the normal pipeline has lost track of, by status."""
+    now = timezone.now()
+    return {
+        'UNDER_REVIEW': Comment.objects.filter(
+            status='UNDER_REVIEW', created_at__lt=now - timedelta(seconds=settings.STUCK_COMMENT_AGE)
+        ),
+        'MODERATING': Comment.objects.filter(
+            status='MODERATING', updated_at__lt=now - timedelta(seconds=settings.MODERATION_CLAIM_TIMEOUT)
+        ),
+    }
+
+
+@shared_task(ignore_result=True)
+def sweep_stuck_comments_task():
+    """
+    Re-enqueue comments whose moderation task was lost.
+
+    Covers worker crashes, dropped broker messages, tasks that gave up
+    (e.g. missing credentials) and outbox rows no relay picked up. Oldest first, at most
+    STUCK_COMMENT_BATCH_SIZE per run, onto MODERATION_BACKFILL_QUEUE so a
+    large backlog can't starve new submissions. A Redis SET NX marker per
+    comment skips comments requeued within STUCK_COMMENT_REQUEUE_INTERVAL
+    that are presumably still queued. claim_comment keeps duplicate
+    deliveries harmless either way.
+    """
+    from .outbox import relay_batch
+    from .redis_client import get_redis
+
+    # Outbox rows nobody relayed (e.g. a deployment without the relay
+    # process) are published first, so their comments get moderated
+    published = relay_batch(settings.STUCK_COMMENT_BATCH_SIZE, older_than=settings.OUTBOX_STALE_AGE)
+    if published:
+        logger.warning(f"Published {published} stale outbox messages")
+
+    redis_client = get_redis()
+    budget = settings.STUCK_COMMENT_BATCH_SIZE
+    # Bound the rows inspected when most of the backlog is already requeued
+    scan_budget = budget * 10
+
+    for status, queryset in stuck_comments().items():
+        backlog = queryset.count()
+        metrics.STUCK_COMMENTS.labels(status=status).set(backlog)
+        if not backlog:
+            continue
+
+        requeued = 0
+        last = None
+        while budget > 0 and scan_budget > 0:
+            page = queryset.order_by('created_at', 'id')
+            if last is not None:
+                page = page.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+            rows = list(page.values_list('created_at', 'id')[:min(budget, scan_budget)])
+            if not rows:
+                break
+            last = rows[-1]
+            scan_budget -= len(rows)
+
+            pipe = redis_client.pipeline()
+            for _, comment_id in rows:
+                pipe.set(REQUEUED_KEY.format(comment_id), 1, nx=True, ex=settings.STUCK_COMMENT_REQUEUE_INTERVAL)
+            for (_, comment_id), fresh in zip(rows, pipe.execute()):
+                if fresh:
+                    moderate_comment_task.apply_async((str(comment_id),), queue=settings.MODERATION_BACKFILL_QUEUE)
+                    requeued += 1
+                    budget -= 1
+
+        metrics.STUCK_COMMENTS_REQUEUED.labels(status=status).inc(requeued)
+        if requeued:
+            logger.warning(f"Requeued {requeued} of {backlog} stuck {status} comments on {settings.MODERATION_BACKFILL_QUEUE}")
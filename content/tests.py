@@ -1,3 +1,1056 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from unittest import mock
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+import zlib
+from . import async_views, export, nearduplicate, outbox, prefilter, ratelimit, stats, tasks, trust, views
+from .db_router import ReplicaRouter, ReplicaRoutingMiddleware
+from .management.commands import remoderate
+from .models import User, Post, Comment, ModerationStatsHour, Notification, OutboxMessage
+from .policy import ModerationPolicy
 
-# Create your tests here.
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the tested code uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues FakeRedis commands and runs them on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+def access_token(user):
+    return str(RefreshToken.for_user(user).access_token)
+
+
+# Tests run without Redis or a broker: features backed by them are either
+# turned off here or given a FakeRedis by the tests that exercise them
+@override_settings(
+    AUTHOR_TRUST_ENABLED=False,
+    RATE_LIMIT_ENABLED=False,
+    NEAR_DUPLICATE_BACKEND='memory',
+    DATABASE_REPLICAS=[],
+)
+class ContentTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pw')
+        self.admin = User.objects.create_user(username='root', password='pw', role='admin')
+        self.post = Post.objects.create(title='Hello', content='First post', author=self.user)
+        self.client = APIClient()
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+
+
+# -------------------------
+# OUTBOX
+# -------------------------
+
+class OutboxTests(ContentTestCase):
+    def test_submit_writes_outbox_row_for_relay(self):
+        self.login(self.user)
+        response = self.client.post(f'/api/posts/{self.post.id}/comments/submit/', {'content': 'Nice post'})
+        self.assertEqual(response.status_code, 201)
+
+        comment = Comment.objects.get(id=response.data['id'])
+        self.assertEqual(comment.status, 'UNDER_REVIEW')
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, tasks.moderate_comment_task.name)
+        self.assertEqual(message.args, [str(comment.id)])
+
+        with mock.patch.object(outbox.celery_app, 'send_task') as send_task:
+            self.assertEqual(outbox.relay_batch(), 1)
+        send_task.assert_called_once()
+        self.assertEqual(send_task.call_args.args[0], tasks.moderate_comment_task.name)
+        self.assertEqual(send_task.call_args.kwargs['args'], [str(comment.id)])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_comment_and_outbox_row_commit_together(self):
+        self.login(self.user)
+        with mock.patch('content.views.enqueue_task', side_effect=DatabaseError("outbox unavailable")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(f'/api/posts/{self.post.id}/comments/submit/', {'content': 'Nice post'})
+        self.assertFalse(Comment.objects.exists())
+
+    def test_failed_publish_stays_in_outbox(self):
+        outbox.enqueue_task(tasks.moderate_comment_task, 'some-id')
+        with mock.patch.object(outbox.celery_app, 'send_task', side_effect=ConnectionError("broker down")):
+            self.assertEqual(outbox.relay_batch(), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+
+    def test_stale_only_pass_skips_fresh_rows(self):
+        outbox.enqueue_task(tasks.moderate_comment_task, 'some-id')
+        with mock.patch.object(outbox.celery_app, 'send_task') as send_task:
+            self.assertEqual(outbox.relay_batch(older_than=60), 0)
+        send_task.assert_not_called()
+
+
+# -------------------------
+# MODERATION STATE
+# -------------------------
+
+class CommentTransitionTests(ContentTestCase):
+    def test_compare_and_set(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='FLAGGED')
+        first = Comment.objects.get(id=comment.id)
+        second = Comment.objects.get(id=comment.id)
+
+        self.assertTrue(first.transition('FLAGGED', 'APPROVED'))
+        self.assertFalse(second.transition('FLAGGED', 'REJECTED'))
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.status, 'APPROVED')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 1)
+
+    def test_leaving_approved_decrements_counter(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='UNDER_REVIEW')
+        comment.transition('UNDER_REVIEW', 'APPROVED')
+        comment.transition('APPROVED', 'FLAGGED')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 0)
+
+    def test_admin_action_conflict(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='FLAGGED')
+        # The admin acted on a FLAGGED comment that has since been approved
+        stale = Comment.objects.get(id=comment.id)
+        Comment.objects.get(id=comment.id).transition('FLAGGED', 'APPROVED')
+
+        self.login(self.admin)
+        with mock.patch('content.views.get_object_or_404', return_value=stale), \
+                mock.patch('content.views.delete_rejected_comment_task') as delete_task:
+            response = self.client.post(f'/api/admin/comments/{comment.id}/action/', {'action': 'reject'})
+
+        self.assertEqual(response.status_code, 409)
+        delete_task.apply_async.assert_not_called()
+        comment.refresh_from_db()
+        self.assertEqual(comment.status, 'APPROVED')
+        self.assertFalse(Notification.objects.filter(recipient=self.user).exists())
+
+
+# -------------------------
+# CHUNKED MODERATION
+# -------------------------
+
+def moderation_result(confidence):
+    return {'moderationCategories': [{'name': 'Toxic', 'confidence': confidence}]}
+
+
+class ChunkedModerationTests(SimpleTestCase):
+    def test_split_prefers_sentence_boundaries(self):
+        content = "One two three. Four five six. Seven eight nine."
+        chunks = tasks.split_text(content, 32)
+        self.assertEqual([text for _, text in chunks], ["One two three. Four five six. ", "Seven eight nine."])
+        self.assertEqual([offset for offset, _ in chunks], [0, 30])
+
+    def test_split_falls_back_to_whitespace_then_hard_cut(self):
+        self.assertEqual(tasks.split_text("aaaa bbbb cccc", 10), [(0, "aaaa bbbb "), (10, "cccc")])
+        self.assertEqual(tasks.split_text("x" * 25, 10), [(0, "x" * 10), (10, "x" * 10), (20, "x" * 5)])
+
+    def test_merge_keeps_highest_confidence_per_category(self):
+        merged = tasks.merge_category_scores([
+            {'moderationCategories': [{'name': 'Toxic', 'confidence': 0.2}, {'name': 'Insult', 'confidence': 0.7}]},
+            {'moderationCategories': [{'name': 'Toxic', 'confidence': 0.9}, {'name': 'Insult', 'confidence': 0.1}]},
+        ])
+        self.assertEqual({c['name']: c['confidence'] for c in merged}, {'Toxic': 0.9, 'Insult': 0.7})
+
+    @override_settings(MODERATION_CHUNK_CHARS=12, MODERATION_CHUNK_CONCURRENCY=2)
+    def test_scores_merged_across_chunks(self):
+        scores = {'first': 0.1, 'second': 0.5, 'third': 0.3}
+        with mock.patch('content.tasks.call_moderation_api',
+                        side_effect=lambda text, token: moderation_result(scores[text.split()[0]])):
+            result = tasks.moderate_text("first one. second one. third one.", 'token')
+        self.assertEqual(result['chunkCount'], 3)
+        self.assertEqual([chunk['offset'] for chunk in result['chunks']], [0, 11, 23])
+        self.assertEqual(result['moderationCategories'], [{'name': 'Toxic', 'confidence': 0.5}])
+
+    @override_settings(MODERATION_CHUNK_CHARS=6, MODERATION_CHUNK_CONCURRENCY=1)
+    def test_flagged_chunk_cancels_the_rest(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def call_moderation_api(text, token):
+            calls.append(text)
+            if len(calls) > 1:
+                release.wait(5)
+            return moderation_result(0.95)
+
+        with mock.patch('content.tasks.call_moderation_api', side_effect=call_moderation_api):
+            result = tasks.moderate_text("abcd. " * 6, 'token')
+        self.assertEqual(result['chunkCount'], 6)
+        self.assertEqual(len(result['chunks']), 1)
+        # At most the chunk already picked up by the worker was sent
+        self.assertLessEqual(len(calls), 2)
+
+
+# -------------------------
+# PRE-FILTER
+# -------------------------
+
+class PrefilterTests(ContentTestCase):
+    CLEAN = ["thanks for the great post", "really nice work", "I agree with this point",
+             "interesting article thanks", "good idea nice read"]
+    FLAGGED = ["you stupid idiot", "I hate you idiot", "stupid hate attack", "kill the idiot", "you are stupid"]
+
+    def trained_model(self):
+        texts = self.CLEAN + self.FLAGGED
+        labels = [0] * len(self.CLEAN) + [1] * len(self.FLAGGED)
+        model = prefilter.PrefilterModel.train(texts, labels, n_features=2 ** 10)
+        model.calibrate(texts, labels, max_miss_rate=0.0)
+        return model
+
+    def test_training_separates_classes(self):
+        model = self.trained_model()
+        self.assertLess(model.predict_proba(self.CLEAN).max(), model.predict_proba(self.FLAGGED).min())
+
+    def test_calibrated_threshold_misses_no_flagged_example(self):
+        model = self.trained_model()
+        self.assertTrue(model.is_clean(self.CLEAN).all())
+        self.assertFalse(model.is_clean(self.FLAGGED).any())
+
+    def test_model_reloaded_from_settings_path(self):
+        model = self.trained_model()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'prefilter.npz')
+            model.save(path)
+            with override_settings(PREFILTER_ENABLED=True, PREFILTER_MODEL_PATH=path):
+                loaded = prefilter.get_model()
+            with override_settings(PREFILTER_ENABLED=False, PREFILTER_MODEL_PATH=path):
+                self.assertIsNone(prefilter.get_model())
+        self.assertEqual(loaded.threshold, model.threshold)
+        self.assertEqual(loaded.predict_proba(self.CLEAN).tolist(), model.predict_proba(self.CLEAN).tolist())
+
+    def test_clean_comment_approved_without_api_call(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content=self.CLEAN[0], status='UNDER_REVIEW')
+        with mock.patch('content.tasks.prefilter.get_model', return_value=self.trained_model()), \
+                mock.patch('content.tasks.get_google_cloud_token') as get_token:
+            tasks.moderate_comment_task.apply(args=[str(comment.id)])
+        get_token.assert_not_called()
+        comment.refresh_from_db()
+        self.assertEqual(comment.status, 'APPROVED')
+        self.assertIn('prefilter', comment.moderation_response)
+
+
+# -------------------------
+# NEAR-DUPLICATE DETECTION
+# -------------------------
+
+@override_settings(NEAR_DUPLICATE_ENABLED=True, NEAR_DUPLICATE_MAX_DISTANCE=3)
+class NearDuplicateTests(ContentTestCase):
+    SPAM = "Buy cheap watches now at the best online store with free shipping today"
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(nearduplicate, '_memory_index', nearduplicate.MemoryIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def comment(self, content, status='MODERATING'):
+        return Comment.objects.create(post=self.post, author=self.user, content=content, status=status)
+
+    def test_matches_small_variations_only(self):
+        flagged = self.comment(self.SPAM, status='FLAGGED')
+        nearduplicate.remember(flagged)
+
+        match = nearduplicate.find_near_duplicate(self.SPAM + "!")
+        self.assertEqual(match[0], str(flagged.id))
+        self.assertLessEqual(match[1], 3)
+        self.assertIsNone(nearduplicate.find_near_duplicate(
+            "The new park opened downtown and families spent the whole afternoon there"
+        ))
+        self.assertIsNone(nearduplicate.find_near_duplicate(self.SPAM, exclude_id=flagged.id))
+
+    def test_forget(self):
+        flagged = self.comment(self.SPAM, status='FLAGGED')
+        nearduplicate.remember(flagged)
+        nearduplicate.forget(flagged)
+        self.assertIsNone(nearduplicate.find_near_duplicate(self.SPAM))
+
+    def test_only_confirmed_flags_are_indexed(self):
+        for source in ("Near-duplicate Index", "Mock Moderation"):
+            tasks.apply_moderation_decision(self.comment(self.SPAM), True, source=source)
+            self.assertIsNone(nearduplicate.find_near_duplicate(self.SPAM), source)
+
+        confirmed = self.comment(self.SPAM)
+        tasks.apply_moderation_decision(confirmed, True, source="Google Cloud API")
+        self.assertEqual(nearduplicate.find_near_duplicate(self.SPAM)[0], str(confirmed.id))
+
+
+# -------------------------
+# RE-MODERATION
+# -------------------------
+
+def toxic_response(confidence):
+    return {'moderationCategories': [{'name': 'Toxic', 'confidence': confidence},
+                                     {'name': 'Health', 'confidence': 0.8}]}
+
+
+class RemoderationTests(ContentTestCase):
+    def test_batch_verdicts_match_single_evaluation(self):
+        policy = ModerationPolicy({'default': 0.6, 'Health': 0.9})
+        responses = [toxic_response(0.1), toxic_response(0.7), None, {'moderationCategories': []}]
+        self.assertEqual(
+            policy.evaluate_batch(responses).tolist(),
+            [policy.flagged_category((r or {}).get('moderationCategories', [])) is not None for r in responses],
+        )
+        self.assertEqual(policy.evaluate_batch(responses).tolist(), [False, True, False, False])
+
+    @override_settings(MODERATION_POLICY={'default': 0.6, 'Health': 0.9})
+    def test_apply_flips_machine_decisions_only(self):
+        lowered = Comment.objects.create(post=self.post, author=self.user, content='a', status='APPROVED',
+                                         moderation_response=toxic_response(0.5))
+        unchanged = Comment.objects.create(post=self.post, author=self.user, content='b', status='APPROVED',
+                                           moderation_response=toxic_response(0.1))
+        # Above the current threshold yet approved: an admin overrode the API
+        overridden = Comment.objects.create(post=self.post, author=self.user, content='c', status='APPROVED',
+                                            moderation_response=toxic_response(0.7))
+        Post.objects.filter(id=self.post.id).update(approved_comment_count=3)
+
+        call_command('remoderate', policy='{"default": 0.4, "Health": 0.9}', apply=True, stdout=io.StringIO())
+
+        statuses = dict(Comment.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[lowered.id], 'FLAGGED')
+        self.assertEqual(statuses[unchanged.id], 'APPROVED')
+        self.assertEqual(statuses[overridden.id], 'APPROVED')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 2)
+
+    def test_apply_skips_comments_changed_since_read(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='a', status='REJECTED',
+                                         moderation_response=toxic_response(0.5))
+        Post.objects.filter(id=self.post.id).update(approved_comment_count=1)
+
+        remoderate.Command().apply_changes([comment.id], 'APPROVED', 'FLAGGED')
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.status, 'REJECTED')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 1)
+
+
+# -------------------------
+# EXPORT
+# -------------------------
+
+class ExportTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.old = Comment.objects.create(post=self.post, author=self.user, content='old', status='APPROVED',
+                                          moderation_response=toxic_response(0.1))
+        self.new = Comment.objects.create(post=self.post, author=self.user, content='new, "quoted"', status='FLAGGED',
+                                          moderation_response=toxic_response(0.9))
+        Comment.objects.filter(id=self.old.id).update(created_at=now - timedelta(days=10))
+        self.login(self.admin)
+
+    def export(self, **params):
+        response = self.client.get('/api/admin/comments/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_filters(self):
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = [json.loads(line) for line in self.export(created_after=since).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [str(self.new.id)])
+        rows = [json.loads(line) for line in self.export(status='APPROVED').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [str(self.old.id)])
+        self.assertEqual(rows[0]['scores'], {'Toxic': 0.1, 'Health': 0.8})
+
+        response = self.client.get('/api/admin/comments/export/', {'created_before': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_csv_columns(self):
+        rows = list(csv.reader(io.StringIO(self.export(export_format='csv').decode())))
+        self.assertEqual(rows[0], export.COLUMN_NAMES + export.MODERATION_CATEGORIES)
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.old.id), str(self.new.id)])
+        new = dict(zip(rows[0], rows[2]))
+        self.assertEqual(new['content'], 'new, "quoted"')
+        self.assertEqual((new['Toxic'], new['Health'], new['Insult']), ('0.9', '0.8', ''))
+
+    def test_gzip_stream_is_one_member(self):
+        plain = self.export()
+        with mock.patch('content.export.BLOCK_SIZE', 1):
+            response = self.client.get('/api/admin/comments/export/', {'gzip': '1'})
+            blocks = list(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertGreater(len(blocks), 1)
+        body = b''.join(blocks)
+        self.assertEqual(zlib.decompress(body, wbits=31), plain)
+        self.assertEqual(gzip.decompress(body), plain)
+
+    def test_admin_only(self):
+        self.login(self.user)
+        self.assertEqual(self.client.get('/api/admin/comments/export/').status_code, 403)
+
+
+# -------------------------
+# MODERATION STATISTICS
+# -------------------------
+
+class ModerationStatsTests(ContentTestCase):
+    def record(self, moment=None, **increments):
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.record(moment, **increments)
+
+    def test_record_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            stats.record(comments_submitted=1)
+            stats.record(comments_submitted=1, auto_approved=1)
+        self.assertFalse(ModerationStatsHour.objects.exists())
+        for callback in callbacks:
+            callback()
+        row = ModerationStatsHour.objects.get()
+        self.assertEqual((row.comments_submitted, row.auto_approved), (2, 1))
+
+    def test_summarize_by_hour_and_day(self):
+        morning = stats.hour_bucket(timezone.now() - timedelta(days=2)).replace(hour=10)
+        self.record(morning, auto_approved=3, auto_flagged=1)
+        self.record(morning + timedelta(minutes=70), admin_approved=1, admin_rejected=1,
+                    admin_flagged_reviews=1, admin_review_seconds=120)
+
+        hourly = stats.summarize(morning - timedelta(hours=1))
+        self.assertEqual([bucket['bucket'] for bucket in hourly['buckets']], [morning, morning + timedelta(hours=1)])
+        self.assertEqual(hourly['buckets'][0]['flag_rate'], 0.25)
+        self.assertIsNone(hourly['buckets'][1]['flag_rate'])
+        # Two reviews, but only one of a flagged comment
+        self.assertEqual(hourly['totals']['avg_admin_review_seconds'], 120)
+        self.assertEqual(hourly['totals']['reject_rate'], 0.5)
+
+        daily = stats.summarize(morning - timedelta(hours=1), granularity='day')
+        self.assertEqual(len(daily['buckets']), 1)
+        self.assertEqual(daily['buckets'][0]['auto_approved'], 3)
+        self.assertEqual(daily['buckets'][0]['admin_approved'], 1)
+
+    def test_review_time_counts_flagged_comments_only(self):
+        flagged = Comment.objects.create(post=self.post, author=self.user, content='a', status='FLAGGED')
+        Comment.objects.filter(id=flagged.id).update(updated_at=timezone.now() - timedelta(seconds=60))
+        pending = Comment.objects.create(post=self.post, author=self.user, content='b', status='UNDER_REVIEW')
+        self.login(self.admin)
+        for comment in (flagged, pending):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/admin/comments/{comment.id}/action/', {'action': 'approve'})
+            self.assertEqual(response.status_code, 200)
+
+        totals = stats.summarize(timezone.now() - timedelta(hours=1))['totals']
+        self.assertEqual(totals['admin_approved'], 2)
+        self.assertEqual(totals['admin_flagged_reviews'], 1)
+        self.assertAlmostEqual(totals['avg_admin_review_seconds'], 60, delta=5)
+
+    def test_retract_never_goes_negative(self):
+        self.record(auto_approved=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.retract(auto_approved=2)
+        self.assertEqual(ModerationStatsHour.objects.get().auto_approved, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.retract(auto_approved=1)
+            stats.retract(timezone.now() - timedelta(days=1), auto_approved=1)
+        self.assertEqual(ModerationStatsHour.objects.get().auto_approved, 0)
+
+
+# -------------------------
+# POST COMMENT COUNTERS
+# -------------------------
+
+backfill_migration = importlib.import_module('content.migrations.0012_backfill_post_comment_counters')
+
+
+class PostCounterRepairTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        # Created directly, bypassing transition(), so the counters drift
+        self.comments = [
+            Comment.objects.create(post=self.post, author=self.user, content=content, status=status)
+            for content, status in [('a', 'APPROVED'), ('b', 'APPROVED'), ('c', 'FLAGGED')]
+        ]
+        self.quiet = Post.objects.create(title='Quiet', content='No comments', author=self.user)
+
+    def assert_counters_match_comments(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 2)
+        self.assertEqual(self.post.last_activity_at, max(c.updated_at for c in self.comments[:2]))
+
+    def test_repair_fixes_drifted_posts_only(self):
+        quiet_version = self.quiet.comment_version
+        out = io.StringIO()
+        call_command('repair_post_counters', batch_size=1, stdout=out)
+
+        self.assert_counters_match_comments()
+        self.assertEqual(self.post.comment_version, 1)
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.comment_version, quiet_version)
+        self.assertIn("Checked 2 posts, repaired 1", out.getvalue())
+
+    def test_backfill_migration(self):
+        schema_editor = mock.Mock(connection=connections['default'])
+        with mock.patch.object(backfill_migration, 'BATCH_SIZE', 1):
+            backfill_migration.backfill_post_counters(django_apps, schema_editor)
+        self.assert_counters_match_comments()
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.approved_comment_count, 0)
+        self.assertIsNone(self.quiet.last_activity_at)
+
+
+# -------------------------
+# CONDITIONAL REQUESTS
+# -------------------------
+
+class ConditionalGetTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login(self.user)
+
+    def test_if_none_match(self):
+        for url in (f'/api/posts/{self.post.id}/', f'/api/posts/{self.post.id}/comments/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+            # Only the validators are read, never the post or its comments
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertFalse(response.content)
+
+    def test_comment_change_invalidates_etag(self):
+        url = f'/api/posts/{self.post.id}/comments/'
+        etag = self.client.get(url)['ETag']
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='UNDER_REVIEW')
+        comment.transition('UNDER_REVIEW', 'APPROVED')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['content'] for c in response.data], ['Hi'])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        url = f'/api/posts/{self.post.id}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        earlier = http_date((self.post.updated_at - timedelta(hours=1)).timestamp())
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+
+    def test_unknown_post(self):
+        self.assertEqual(self.client.get(f'/api/posts/{uuid.uuid4()}/comments/').status_code, 404)
+
+
+# -------------------------
+# READ REPLICAS
+# -------------------------
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pw')
+        self.other = User.objects.create_user(username='bob', password='pw')
+        self.redis = FakeRedis()
+        patcher = mock.patch('content.db_router.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def routed_alias(self, method, user, status=200):
+        """Alias the router picks for reads made while handling the request."""
+        request = RequestFactory().generic(method, '/', HTTP_AUTHORIZATION=f'Bearer {access_token(user)}')
+        seen = {}
+
+        def get_response(request):
+            seen['alias'] = ReplicaRouter().db_for_read(Post)
+            return HttpResponse(status=status)
+
+        ReplicaRoutingMiddleware(get_response)(request)
+        return seen['alias']
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.routed_alias('GET', self.user), 'replica_0')
+        self.assertEqual(self.routed_alias('HEAD', self.user), 'replica_0')
+
+    def test_unsafe_requests_read_from_primary(self):
+        self.assertEqual(self.routed_alias('POST', self.user, status=201), 'default')
+
+    def test_writer_sticks_to_primary(self):
+        self.routed_alias('POST', self.user, status=201)
+        self.assertEqual(self.routed_alias('GET', self.user), 'default')
+        # Only the writer is pinned
+        self.assertEqual(self.routed_alias('GET', self.other), 'replica_0')
+
+    def test_failed_write_does_not_stick(self):
+        self.routed_alias('POST', self.user, status=400)
+        self.assertEqual(self.routed_alias('GET', self.user), 'replica_0')
+
+    def test_primary_when_stickiness_unknown(self):
+        with mock.patch('content.db_router.get_redis', side_effect=ConnectionError("down")):
+            self.assertEqual(self.routed_alias('GET', self.user), 'default')
+
+    def test_primary_outside_requests(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(Post), 'default')
+
+    def test_export_stays_on_replica_while_streaming(self):
+        admin = User.objects.create_user(username='root', password='pw', role='admin')
+        request = RequestFactory().get('/api/admin/comments/export/', HTTP_AUTHORIZATION=f'Bearer {access_token(admin)}')
+        # The unit-test replica alias has no connection; skip the user lookup
+        force_authenticate(request, user=admin)
+        with mock.patch('content.views.stream_export', return_value=iter([b''])) as stream_export:
+            response = ReplicaRoutingMiddleware(views.admin_export_comments)(request)
+        self.assertEqual(response.status_code, 200)
+        queryset = stream_export.call_args.args[0]
+        # Evaluated after the middleware has returned, when routing is reset
+        self.assertEqual(queryset.db, 'replica_0')
+
+
+@unittest.skipUnless(settings.DATABASE_REPLICAS, "set DATABASE_REPLICA_URLS to run against a mirrored replica")
+class ReplicaMirrorTests(TransactionTestCase):
+    # The mirror is a second connection to the test database, so rows must be
+    # committed for it to see them
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pw')
+        self.post = Post.objects.create(title='Hello', content='First post', author=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(self.user)}')
+
+    def test_reads_hit_replica_until_user_writes(self):
+        replica = settings.DATABASE_REPLICAS[0]
+        redis = FakeRedis()
+        with mock.patch('content.db_router.get_redis', return_value=redis), \
+                mock.patch('content.db_router.random.choice', return_value=replica):
+            with CaptureQueriesContext(connections[replica]) as replica_queries:
+                response = self.client.get(f'/api/posts/{self.post.id}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['title'], 'Hello')
+            self.assertTrue(replica_queries.captured_queries)
+
+            with override_settings(AUTHOR_TRUST_ENABLED=False, RATE_LIMIT_ENABLED=False):
+                response = self.client.post(f'/api/posts/{self.post.id}/comments/submit/', {'content': 'Nice'})
+            self.assertEqual(response.status_code, 201)
+
+            with CaptureQueriesContext(connections[replica]) as replica_queries:
+                self.client.get(f'/api/posts/{self.post.id}/comments/')
+            self.assertFalse(replica_queries.captured_queries)
+
+    def test_export_streams_from_replica(self):
+        replica = settings.DATABASE_REPLICAS[0]
+        admin = User.objects.create_user(username='root', password='pw', role='admin')
+        Comment.objects.create(post=self.post, author=self.user, content='Hi', status='APPROVED')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(admin)}')
+        with mock.patch('content.db_router.get_redis', return_value=FakeRedis()), \
+                mock.patch('content.db_router.random.choice', return_value=replica):
+            response = self.client.get('/api/admin/comments/export/')
+            with CaptureQueriesContext(connections[replica]) as replica_queries:
+                body = b''.join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 1)
+        self.assertTrue(replica_queries.captured_queries)
+
+
+# -------------------------
+# RATE LIMITING
+# -------------------------
+
+@override_settings(RATE_LIMIT_ENABLED=True)
+class RateLimitTests(ContentTestCase):
+    def login_attempt(self, **extra):
+        return self.client.post('/api/auth/login/', {'username': 'alice', 'password': 'wrong'}, format='json', **extra)
+
+    def test_fails_open_without_redis(self):
+        with mock.patch.object(ratelimit, '_script', None), \
+                mock.patch('content.ratelimit.get_redis', side_effect=ConnectionError("down")):
+            response = self.login_attempt()
+        self.assertEqual(response.status_code, 401)
+
+    def test_full_window_returns_429(self):
+        script = mock.Mock(return_value=[1500, 2])
+        with mock.patch.object(ratelimit, '_script', script):
+            response = self.login_attempt()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+
+    def test_username_windows(self):
+        script = mock.Mock(return_value=[0, 0])
+        with mock.patch.object(ratelimit, '_script', script):
+            self.login_attempt(REMOTE_ADDR='10.0.0.1')
+            self.login_attempt(REMOTE_ADDR='10.0.0.2')
+
+        # A tight window per (username, ip) and a loose one for the account
+        self.assertEqual([call.kwargs['keys'] for call in script.call_args_list], [
+            ['ratelimit:login:ip:10.0.0.1', 'ratelimit:login:username_ip:alice@10.0.0.1', 'ratelimit:login:username:alice'],
+            ['ratelimit:login:ip:10.0.0.2', 'ratelimit:login:username_ip:alice@10.0.0.2', 'ratelimit:login:username:alice'],
+        ])
+
+    def test_reports_the_full_window(self):
+        request = RequestFactory().post('/api/auth/login/', {'username': 'alice'}, REMOTE_ADDR='10.0.0.1')
+        with mock.patch.object(ratelimit, '_script', mock.Mock(return_value=[4200, 3])):
+            self.assertEqual(ratelimit.check('login', request), (5, 'username'))
+
+
+# -------------------------
+# NOTIFICATIONS
+# -------------------------
+
+class FlaggedDigestTests(ContentTestCase):
+    def test_create_then_increment(self):
+        other_admin = User.objects.create_user(username='root2', password='pw', role='admin')
+        admin_ids = [self.admin.id, other_admin.id]
+
+        self.assertEqual(Notification.bump_flagged_digest(admin_ids), 2)
+        self.assertEqual(Notification.bump_flagged_digest(admin_ids), 0)
+
+        digests = Notification.objects.filter(kind='FLAGGED_DIGEST')
+        self.assertEqual(digests.count(), 2)
+        self.assertEqual(sorted(digests.values_list('count', flat=True)), [2, 2])
+        self.assertIn("2 new flagged comments since", digests.first().display_message)
+
+    def test_read_digest_starts_a_new_one(self):
+        Notification.bump_flagged_digest([self.admin.id])
+        Notification.objects.filter(recipient=self.admin).update(is_read=True)
+
+        self.assertEqual(Notification.bump_flagged_digest([self.admin.id]), 1)
+        digest = Notification.objects.get(recipient=self.admin, is_read=False)
+        self.assertEqual(digest.count, 1)
+        self.assertIn("1 new flagged comment since", digest.display_message)
+        self.assertTrue(digest.display_message.endswith("requires review"))
+
+
+# -------------------------
+# FEED
+# -------------------------
+
+class FeedTests(ContentTestCase):
+    def make_posts(self, count, comments_per_post=3):
+        posts = []
+        for i in range(count):
+            post = Post.objects.create(title=f'Post {i}', content='Body', author=self.user)
+            for j in range(comments_per_post):
+                comment = Comment.objects.create(post=post, author=self.admin, content=f'Comment {j}', status='UNDER_REVIEW')
+                comment.transition('UNDER_REVIEW', 'APPROVED')
+            posts.append(post)
+        return posts
+
+    def test_query_count_is_constant(self):
+        self.login(self.user)
+        self.make_posts(2)
+        with CaptureQueriesContext(connections['default']) as small:
+            self.client.get('/api/feed/', {'page_size': 50})
+        self.make_posts(10)
+        with CaptureQueriesContext(connections['default']) as large:
+            response = self.client.get('/api/feed/', {'page_size': 50})
+
+        self.assertEqual(len(response.data['results']), 13)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(large), 2)
+
+    def test_comment_previews(self):
+        self.login(self.user)
+        post = self.make_posts(1, comments_per_post=5)[0]
+        response = self.client.get('/api/feed/', {'comments': 2})
+
+        item = next(item for item in response.data['results'] if item['id'] == str(post.id))
+        self.assertEqual(item['comment_count'], 5)
+        self.assertEqual([c['content'] for c in item['latest_comments']], ['Comment 4', 'Comment 3'])
+
+    def test_keyset_pages_cover_every_post_once(self):
+        self.login(self.user)
+        self.make_posts(6, comments_per_post=0)
+        # Ties on created_at are broken by id
+        Post.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/feed/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        expected = [str(pk) for pk in Post.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        self.assertEqual(seen, expected)
+
+    def test_bad_cursor(self):
+        self.login(self.user)
+        response = self.client.get('/api/feed/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+# -------------------------
+# SEARCH
+# -------------------------
+
+class SearchTests(ContentTestCase):
+    def test_keyset_pages(self):
+        self.login(self.user)
+        for i in range(5):
+            Post.objects.create(title=f'Gardening tips {i}', content='Tomatoes and gardening', author=self.user)
+
+        seen, cursor = [], None
+        while True:
+            params = {'q': 'gardening', 'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/search/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_only_approved_comments(self):
+        self.login(self.user)
+        Comment.objects.create(post=self.post, author=self.user, content='Pending gardening advice', status='UNDER_REVIEW')
+        approved = Comment.objects.create(post=self.post, author=self.user, content='Approved gardening advice', status='APPROVED')
+
+        response = self.client.get('/api/search/', {'q': 'gardening', 'type': 'comments'})
+        self.assertEqual([item['id'] for item in response.data['results']], [str(approved.id)])
+
+    def test_bad_cursor(self):
+        self.login(self.user)
+        response = self.client.get('/api/search/', {'q': 'hello', 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+# -------------------------
+# AUTHOR TRUST
+# -------------------------
+
+@override_settings(AUTHOR_TRUST_ENABLED=True, AUTHOR_TRUST_MIN_APPROVED=2, AUTHOR_TRUST_THRESHOLD=0.7,
+                   AUTHOR_TRUST_SAMPLE_RATE=1.0)
+class AuthorTrustTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        patcher = mock.patch('content.trust.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_comments(self, status, count, moderation_response=None):
+        for i in range(count):
+            Comment.objects.create(post=self.post, author=self.user, content=f'{status} {i}', status=status,
+                                   moderation_response=moderation_response)
+
+    def test_unaudited_fast_path_approvals_do_not_count(self):
+        self.add_comments('APPROVED', 3)
+        self.add_comments('APPROVED', 2, {'trustedAuthor': True})
+        self.add_comments('APPROVED', 1, {'trustedAuthor': True, 'trustedAuthorAudit': True})
+        self.add_comments('FLAGGED', 1)
+        self.add_comments('REJECTED', 1)
+        # (approved + 1) / (approved + flagged + 2 * rejected + 2)
+        self.assertEqual(trust.compute(self.user.id), {'score': 5 / 9, 'approved': 4})
+
+    def test_trusted_author_fast_path(self):
+        self.add_comments('APPROVED', 3)
+        self.login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/posts/{self.post.id}/comments/submit/', {'content': 'Nice post'})
+        self.assertEqual(response.status_code, 201)
+
+        comment = Comment.objects.get(id=response.data['id'])
+        self.assertEqual(comment.status, 'APPROVED')
+        self.assertEqual(comment.moderation_response, {'trustedAuthor': True})
+        self.assertEqual(OutboxMessage.objects.get().task_name, tasks.audit_comment_task.name)
+        totals = stats.summarize(timezone.now() - timedelta(hours=1))['totals']
+        self.assertEqual((totals['comments_submitted'], totals['auto_approved']), (1, 1))
+
+    def test_revoked_author_is_moderated(self):
+        self.add_comments('APPROVED', 3)
+        self.assertTrue(trust.is_trusted(self.user.id))
+        trust.revoke(self.user.id)
+        self.assertFalse(trust.is_trusted(self.user.id))
+
+    def audit(self, comment, confidence):
+        with mock.patch('content.tasks.get_google_cloud_token', return_value='token'), \
+                mock.patch('content.tasks.moderate_text', return_value=moderation_result(confidence)), \
+                self.captureOnCommitCallbacks(execute=True):
+            tasks.audit_comment_task.apply(args=[str(comment.id)])
+        comment.refresh_from_db()
+
+    def test_flagged_audit_reverses_approval(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='UNDER_REVIEW')
+        comment.transition('UNDER_REVIEW', 'APPROVED', moderation_response={'trustedAuthor': True})
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.record(comments_submitted=1, auto_approved=1)
+
+        self.audit(comment, 0.9)
+
+        self.assertEqual(comment.status, 'FLAGGED')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 0)
+        row = ModerationStatsHour.objects.get()
+        self.assertEqual((row.auto_approved, row.auto_flagged), (0, 1))
+        self.assertTrue(self.redis.exists(trust.REVOKED_KEY.format(self.user.id)))
+
+    def test_passed_audit_counts_towards_trust(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi', status='APPROVED',
+                                         moderation_response={'trustedAuthor': True})
+        self.assertEqual(trust.compute(self.user.id)['approved'], 0)
+
+        self.audit(comment, 0.1)
+
+        self.assertEqual(comment.status, 'APPROVED')
+        self.assertTrue(comment.moderation_response['trustedAuthorAudit'])
+        self.assertEqual(trust.compute(self.user.id)['approved'], 1)
+
+
+# -------------------------
+# STUCK-COMMENT SWEEPER
+# -------------------------
+
+@override_settings(STUCK_COMMENT_AGE=600, MODERATION_CLAIM_TIMEOUT=300, STUCK_COMMENT_BATCH_SIZE=10)
+class StuckCommentSweeperTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        patcher = mock.patch('content.redis_client.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_comment(self, status, age):
+        comment = Comment.objects.create(post=self.post, author=self.user, content=status, status=status)
+        then = timezone.now() - timedelta(seconds=age)
+        Comment.objects.filter(id=comment.id).update(created_at=then, updated_at=then)
+        return comment
+
+    def sweep(self):
+        with mock.patch.object(tasks.moderate_comment_task, 'apply_async') as apply_async:
+            tasks.sweep_stuck_comments_task.apply()
+        for call in apply_async.call_args_list:
+            self.assertEqual(call.kwargs['queue'], settings.MODERATION_BACKFILL_QUEUE)
+        return [call.args[0][0] for call in apply_async.call_args_list]
+
+    def test_requeues_lost_comments_once(self):
+        lost = self.add_comment('UNDER_REVIEW', 900)
+        abandoned = self.add_comment('MODERATING', 400)
+        self.add_comment('UNDER_REVIEW', 60)
+        self.add_comment('MODERATING', 60)
+        self.add_comment('APPROVED', 900)
+
+        self.assertEqual(self.sweep(), [str(lost.id), str(abandoned.id)])
+        # Still marked as requeued: presumably waiting in the queue
+        self.assertEqual(self.sweep(), [])
+
+        self.redis.delete(tasks.REQUEUED_KEY.format(lost.id))
+        self.assertEqual(self.sweep(), [str(lost.id)])
+
+    @override_settings(STUCK_COMMENT_BATCH_SIZE=2)
+    def test_batch_size_bounds_each_sweep(self):
+        comments = [self.add_comment('UNDER_REVIEW', age) for age in (3000, 2000, 1000)]
+        self.assertEqual(self.sweep(), [str(c.id) for c in comments[:2]])
+        # The next sweep skips past the comments already requeued
+        self.assertEqual(self.sweep(), [str(comments[2].id)])
+
+
+# -------------------------
+# ASYNC VIEWS
+# -------------------------
+
+class AsyncViewParityTests(ContentTestCase):
+    # Headers both implementations set; DRF adds Allow and Vary on its own
+    COMPARED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'WWW-Authenticate']
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            comment = Comment.objects.create(post=self.post, author=self.user, content=f'Comment {i}', status='UNDER_REVIEW')
+            comment.transition('UNDER_REVIEW', 'APPROVED')
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, message=f'Note {i}') for i in range(2)
+        ]
+
+    def assert_same_response(self, name, method='GET', user=None, headers=None, **kwargs):
+        """Call the DRF view and its async twin with equal requests and compare the bytes sent."""
+        def request():
+            extra = {'HTTP_AUTHORIZATION': f'Bearer {access_token(user)}'} if user else {}
+            return RequestFactory().generic(method, '/', **extra, **(headers or {}))
+
+        sync_response = getattr(views, name)(request(), **kwargs)
+        if hasattr(sync_response, 'render'):
+            sync_response.render()
+        async_response = async_to_sync(getattr(async_views, name))(request(), **kwargs)
+
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        for header in self.COMPARED_HEADERS:
+            self.assertEqual(async_response.get(header), sync_response.get(header), header)
+        return sync_response
+
+    def test_post_and_comment_reads(self):
+        for name in ('post_detail', 'get_comments'):
+            response = self.assert_same_response(name, user=self.user, post_id=self.post.id)
+            self.assertEqual(response.status_code, 200)
+            self.assert_same_response(name, user=self.user, post_id=self.post.id,
+                                      headers={'HTTP_IF_NONE_MATCH': response['ETag']})
+            self.assert_same_response(name, user=self.user, post_id=uuid.uuid4())
+
+    def test_notifications(self):
+        self.assert_same_response('get_notifications', user=self.user)
+        for notification in self.notifications:
+            Notification.objects.filter(id=notification.id).update(is_read=False)
+            self.assert_same_response('mark_notification_read', 'POST', user=self.user,
+                                      notification_id=notification.id)
+        # Someone else's notification
+        self.assert_same_response('mark_notification_read', 'POST', user=self.admin,
+                                  notification_id=self.notifications[0].id)
+
+    def test_unauthenticated(self):
+        response = self.assert_same_response('get_notifications')
+        self.assertEqual(response.status_code, 401)
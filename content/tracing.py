@@ -0,0 +1,213 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Minimal tracer propagating W3C `traceparent` context and exporting spans as
+# OTLP/JSON, either appended to a local file or POSTed to a collector.
+# Finished spans are queued and exported in batches by a daemon thread, so
+# the traced code path never waits on disk or network I/O.
+
+_current_span = ContextVar('current_span', default=None)
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+_export_lock = threading.Lock()
+_exporter = None
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def tracing_enabled():
+    return settings.TRACING_EXPORTER != 'none'
+
+
+def parse_traceparent(value):
+    """Return (trace_id, parent_span_id) from a `traceparent` value, or None."""
+    match = _TRACEPARENT_RE.match(value or '')
+    return match.groups() if match else None
+
+
+def current_traceparent():
+    """`traceparent` value for the active span, for propagation to tasks."""
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+@contextmanager
+def span(name, traceparent=None, **attributes):
+    """
+    Open a span as a child of the active span.
+
+    `traceparent` continues a trace started in another process (e.g. the
+    value carried in Celery task headers). When tracing is disabled this
+    yields None and does nothing else.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        current = Span(name, parent.trace_id, parent.span_id, attributes)
+    elif remote:
+        current = Span(name, remote[0], remote[1], attributes)
+    else:
+        current = Span(name, os.urandom(16).hex(), None, attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        # Queued as each span ends, so spans of worker threads that finish
+        # after their parent are exported too
+        _get_exporter().submit(current)
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class BatchExporter:
+    """
+    Bounded span queue drained by a daemon thread.
+
+    Spans are dropped (and counted) rather than blocking the caller when
+    the queue is full, e.g. while the collector is unreachable.
+    """
+
+    def __init__(self, max_queue_size, batch_size, interval):
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self.thread.start()
+
+    def submit(self, span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Export everything queued so far (used at interpreter exit)."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                logger.warning(f"Span export queue full, dropped {dropped} spans")
+            _export(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+
+def _get_exporter():
+    global _exporter
+    # The exporter thread does not survive fork (gunicorn/Celery prefork),
+    # so each child process starts its own
+    if _exporter is None or _exporter.pid != os.getpid():
+        with _export_lock:
+            if _exporter is None or _exporter.pid != os.getpid():
+                _exporter = BatchExporter(
+                    settings.TRACING_EXPORT_QUEUE_SIZE,
+                    settings.TRACING_EXPORT_BATCH_SIZE,
+                    settings.TRACING_EXPORT_INTERVAL,
+                )
+    return _exporter
+
+
+@atexit.register
+def _flush_on_exit():
+    if _exporter is not None and _exporter.pid == os.getpid():
+        _exporter.flush()
+
+
+def _export(spans):
+    payload = {
+        'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', settings.TRACING_SERVICE_NAME)]},
+            'scopeSpans': [{
+                'scope': {'name': 'content'},
+                'spans': [s.to_otlp() for s in spans],
+            }],
+        }],
+    }
+
+    try:
+        if settings.TRACING_EXPORTER == 'file':
+            with open(settings.TRACING_EXPORT_FILE, 'a') as f:
+                f.write(json.dumps(payload) + "\n")
+        elif settings.TRACING_EXPORTER == 'otlp':
+            import requests
+            requests.post(settings.TRACING_OTLP_ENDPOINT, json=payload, timeout=settings.TRACING_OTLP_TIMEOUT)
+    except Exception as e:
+        # Tracing must never break the traced code path
+        logger.error(f"Failed to export {len(spans)} spans: {e}")
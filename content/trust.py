@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db.models import Count, Q
+import json
+import logging
+from .models import Comment
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Per-author trust for the submission fast path.
+#
+# The score is a smoothed share of clean outcomes in the author's history,
+# with rejections counting double:
+#     (approved + 1) / (approved + flagged + 2 * rejected + 2)
+# Fast-path approvals only count once audited; otherwise an author's own
+# unchecked comments would keep raising the score that let them skip checks.
+# An author is trusted with at least AUTHOR_TRUST_MIN_APPROVED approved
+# comments and a score of AUTHOR_TRUST_THRESHOLD or more. Scores are cached
+# for AUTHOR_TRUST_CACHE_SECONDS; a flag or rejection drops the cache and
+# blocks the fast path for AUTHOR_TRUST_REVOKE_SECONDS regardless of score.
+
+SCORE_KEY = 'author-trust:{}'
+REVOKED_KEY = 'author-trust-revoked:{}'
+
+
+def compute(author_id):
+    """Trust score and approved-comment count from the author's history."""
+    counts = Comment.objects.filter(author_id=author_id).aggregate(
+        approved=Count('id', filter=Q(status='APPROVED')),
+        flagged=Count('id', filter=Q(status='FLAGGED')),
+        rejected=Count('id', filter=Q(status='REJECTED')),
+        unaudited=Count('id', filter=Q(
+            status='APPROVED',
+            moderation_response__trustedAuthor=True,
+            moderation_response__trustedAuthorAudit__isnull=True,
+        )),
+    )
+    approved = counts['approved'] - counts['unaudited']
+    score = (approved + 1) / (approved + counts['flagged'] + 2 * counts['rejected'] + 2)
+    return {'score': score, 'approved': approved}
+
+
+def is_trusted(author_id):
+    """
+    Whether the author's comments may skip pre-publication moderation.
+
+    One Redis round trip on a cache hit, plus one aggregate query on a miss.
+    Returns False when disabled or when Redis is unavailable.
+    """
+    if not settings.AUTHOR_TRUST_ENABLED:
+        return False
+    try:
+        redis_client = get_redis()
+        cached, revoked = redis_client.mget(SCORE_KEY.format(author_id), REVOKED_KEY.format(author_id))
+        if revoked:
+            return False
+        if cached is None:
+            trust = compute(author_id)
+            redis_client.set(SCORE_KEY.format(author_id), json.dumps(trust), ex=settings.AUTHOR_TRUST_CACHE_SECONDS)
+        else:
+            trust = json.loads(cached)
+    except Exception as e:
+        logger.warning(f"Author trust lookup failed for {author_id}, moderating normally: {e}")
+        return False
+
+    return trust['approved'] >= settings.AUTHOR_TRUST_MIN_APPROVED and trust['score'] >= settings.AUTHOR_TRUST_THRESHOLD
+
+
+def revoke(author_id):
+    """Drop the author's cached score and suspend the fast path."""
+    if not settings.AUTHOR_TRUST_ENABLED:
+        return
+    try:
+        pipe = get_redis().pipeline()
+        pipe.delete(SCORE_KEY.format(author_id))
+        pipe.set(REVOKED_KEY.format(author_id), 1, ex=settings.AUTHOR_TRUST_REVOKE_SECONDS)
+        pipe.execute()
+        logger.info(f"Revoked trust for author {author_id}")
+    except Exception as e:
+        logger.error(f"Failed to revoke trust for author {author_id}: {e}")
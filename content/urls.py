@@ -1,6 +1,10 @@
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Hot read and notification endpoints have async twins for ASGI deployments
+hot_views = async_views if settings.ASYNC_API_VIEWS else views
 
 urlpatterns = [
     # Auth
@@ -8,18 +12,22 @@ urlpatterns = [
     
     # Posts
     path('posts/', views.post_list, name='post-list'),
-    path('posts/<uuid:post_id>/', views.post_detail, name='post-detail'),
+    path('posts/<uuid:post_id>/', hot_views.post_detail, name='post-detail'),
+    path('feed/', views.feed, name='feed'),
+    path('search/', views.search_content, name='search'),
     
     # Comments
-    path('posts/<uuid:post_id>/comments/', views.get_comments, name='get-comments'),
+    path('posts/<uuid:post_id>/comments/', hot_views.get_comments, name='get-comments'),
     path('posts/<uuid:post_id>/comments/submit/', views.submit_comment, name='submit-comment'),
     
     # Admin
     path('admin/comments/flagged/', views.admin_list_flagged_comments, name='admin-flagged-list'),
     path('admin/comments/<uuid:comment_id>/action/', views.admin_comment_action, name='admin-comment-action'),
+    path('admin/comments/export/', views.admin_export_comments, name='admin-comment-export'),
+    path('admin/stats/', views.admin_moderation_stats, name='admin-moderation-stats'),
     
     # Notifications
-    path('notifications/', views.get_notifications, name='get-notifications'),
+    path('notifications/', hot_views.get_notifications, name='get-notifications'),
     
     # Templates
     path('login/', views.view_login, name='view-login'),
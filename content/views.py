@@ -5,15 +5,33 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import authenticate
+from django.db import router, transaction
+from django.db.models import F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import base64
+import binascii
+import random
+import uuid
 from .models import User, Post, Comment, Notification
-from .serializers import UserCreateSerializer, PostSerializer, CommentSerializer, NotificationSerializer
-from .tasks import moderate_comment_task, delete_rejected_comment_task
+from .serializers import UserCreateSerializer, PostSerializer, FeedPostSerializer, CommentSerializer, NotificationSerializer
+from .tasks import moderate_comment_task, audit_comment_task, delete_rejected_comment_task
+from .outbox import enqueue_task
+from .ratelimit import rate_limit
+from .aio import streaming_content
+from .export import FORMATS, ExportFilterError, export_queryset, stream_export
+from . import metrics, nearduplicate, search, stats, tracing, trust
 
 # -------------------------
 # AUTHENTICATION
 # -------------------------
 
+@rate_limit('login')
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_view(request):
@@ -57,7 +75,7 @@ def login_view(request):
 @permission_classes([IsAuthenticated])
 def post_list(request):
     if request.method == 'GET':
-        posts = Post.objects.all()
+        posts = Post.objects.select_related('author')
 
         # Pagination
         page_size = int(request.GET.get('page_size', 20))  # Default 20 posts per page
@@ -92,9 +110,157 @@ def post_list(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    validators = _post_validators(post_id)
+    etag = _post_etag(post_id, validators)
+    last_modified = _last_modified(validators)
+
+    not_modified = _conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
     serializer = PostSerializer(post)
-    return Response(serializer.data)
+    return _with_validators(Response(serializer.data), etag, last_modified)
+
+# -------------------------
+# FEED
+# -------------------------
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def feed(request):
+    """
+    A page of posts, each with its latest approved comments and comment count
+
+    Two queries whatever the page size: the posts (with authors), and every
+    post's latest `comments` approved comments in one ROW_NUMBER() window
+    query (with authors). Pages are keyset paginated with `cursor`.
+    """
+    page_size = min(int(request.GET.get('page_size', 20)), 100)
+    previews = min(int(request.GET.get('comments', settings.FEED_COMMENT_PREVIEWS)), settings.FEED_COMMENT_PREVIEWS_MAX)
+
+    posts = Post.objects.select_related('author').order_by('-created_at', '-id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            created_at, post_id = _decode_feed_cursor(cursor)
+        except ValueError:
+            return Response({"error": "invalid cursor"}, status=400)
+        posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+
+    latest_comments = Comment.objects.filter(status='APPROVED').annotate(
+        preview_rank=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        )
+    ).filter(preview_rank__lte=previews).select_related('author').order_by('post_id', 'preview_rank')
+
+    page = list(posts.prefetch_related(
+        Prefetch('comments', queryset=latest_comments, to_attr='latest_comments')
+    )[:page_size + 1]) if previews else list(posts[:page_size + 1])
+
+    has_more = len(page) > page_size
+    page = page[:page_size]
+    if not previews:
+        for post in page:
+            post.latest_comments = []
+
+    return Response({
+        'results': FeedPostSerializer(page, many=True).data,
+        'next_cursor': _encode_feed_cursor(page[-1]) if has_more else None,
+    })
+
+
+def _encode_feed_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_feed_cursor(cursor):
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError("bad timestamp")
+        return created_at, uuid.UUID(post_id)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+# -------------------------
+# SEARCH
+# -------------------------
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_content(request):
+    """
+    Ranked full-text search over posts or approved comments
+
+    Query params: q, type (posts | comments), page_size, cursor.
+    """
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type', 'posts')
+    if not query:
+        return Response({"error": "q is required"}, status=400)
+    if kind not in search.KINDS:
+        return Response({"error": f"type must be one of: {', '.join(search.KINDS)}"}, status=400)
+    page_size = min(int(request.GET.get('page_size', 20)), 100)
+
+    try:
+        results, next_cursor = search.search(kind, query, limit=page_size, cursor=request.GET.get('cursor'))
+    except search.SearchCursorError as e:
+        return Response({"error": str(e)}, status=400)
+
+    serializer_class = PostSerializer if kind == 'posts' else CommentSerializer
+    data = serializer_class(results, many=True).data
+    for item, obj in zip(data, results):
+        item['rank'] = obj.search_rank
+
+    return Response({'results': data, 'next_cursor': next_cursor})
+
+# -------------------------
+# CONDITIONAL GET
+# -------------------------
+# Validators come from a single-row lookup of Post.updated_at and the
+# per-post comment version, so matching requests get a 304 before anything
+# is serialized.
+
+POST_VALIDATOR_FIELDS = ('updated_at', 'comment_version', 'comments_changed_at')
+
+
+def _post_validators(post_id):
+    validators = Post.objects.filter(id=post_id).values(*POST_VALIDATOR_FIELDS).first()
+    if validators is None:
+        raise Http404
+    return validators
+
+
+def _post_etag(post_id, validators):
+    return f'W/"post-{post_id}-{int(validators["updated_at"].timestamp() * 1e6)}-{validators["comment_version"]}"'
+
+
+def _comments_etag(post_id, validators):
+    return f'W/"comments-{post_id}-{validators["comment_version"]}"'
+
+
+def _last_modified(validators):
+    changed = validators['comments_changed_at']
+    return max(validators['updated_at'], changed) if changed else validators['updated_at']
+
+
+def _conditional_response(request, etag, last_modified):
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is not None:
+        return _with_validators(response, etag, last_modified)
+    return None
+
+
+def _with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = settings.CONDITIONAL_GET_CACHE_CONTROL
+    return response
 
 # -------------------------
 # COMMENTS
@@ -106,26 +272,57 @@ def get_comments(request, post_id):
     """
     Fetch approved comments for a post
     """
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post=post, status='APPROVED') # Only approved comments
+    validators = _post_validators(post_id)
+    etag = _comments_etag(post_id, validators)
+    last_modified = _last_modified(validators)
+
+    not_modified = _conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    comments = Comment.objects.filter(post_id=post_id, status='APPROVED').select_related('author') # Only approved comments
     serializer = CommentSerializer(comments, many=True)
-    return Response(serializer.data)
+    return _with_validators(Response(serializer.data), etag, last_modified)
 
+@rate_limit('submit_comment')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submit_comment(request, post_id):
     """
     Submit a comment -> status=UNDER_REVIEW -> Trigger Celery Task
+
+    Comments by trusted authors (content.trust) are approved right away and
+    sampled for moderation afterwards.
+
+    The moderation task is written to the outbox in the same transaction as
+    the comment and published by the outbox relay, so broker latency or
+    outages never reach this response. Before that transaction the request
+    makes two Redis calls (the rate-limit script and the trust lookup), each
+    bounded by REDIS_SOCKET_TIMEOUT; both fail open, and once Redis has
+    failed they are skipped for REDIS_DOWN_BACKOFF_SECONDS.
     """
     post = get_object_or_404(Post, id=post_id)
     serializer = CommentSerializer(data=request.data)
     
     if serializer.is_valid():
-        comment = serializer.save(author=request.user, post=post, status='UNDER_REVIEW')
-        
-        # Trigger Celery Task
-        moderate_comment_task.delay(comment.id)
-        
+        trusted = trust.is_trusted(request.user.id)
+        with tracing.span('submit_comment', post_id=str(post_id), trusted=trusted), transaction.atomic():
+            comment = serializer.save(author=request.user, post=post, status='UNDER_REVIEW')
+
+            if trusted:
+                # Trusted authors are visible immediately; a sample is
+                # moderated after the fact
+                comment.transition('UNDER_REVIEW', 'APPROVED', moderation_response={'trustedAuthor': True})
+                if random.random() < settings.AUTHOR_TRUST_SAMPLE_RATE:
+                    enqueue_task(audit_comment_task, comment.id)
+            else:
+                # Queue Celery Task via the outbox
+                enqueue_task(moderate_comment_task, comment.id)
+
+        # After the commit: the hourly stats row is shared by every submission
+        stats.record(comments_submitted=1, auto_approved=1 if trusted else 0)
+        if trusted:
+            metrics.observe_decision(comment, 'trusted')
         return Response(serializer.data, status=201)
     return Response(serializer.errors, status=400)
 
@@ -152,27 +349,48 @@ def admin_comment_action(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
     action = request.data.get('action') # 'approve' or 'reject'
     
+    # Compare-and-set against the status the admin acted on, so a concurrent
+    # admin or moderation worker decision is never silently overwritten
+    observed_status = comment.status
+    # Admin turnaround is measured from the moment the comment was flagged
+    flagged_at = comment.updated_at if observed_status == 'FLAGGED' else None
+
     if action == 'approve':
-        comment.status = 'APPROVED'
-        comment.save()
+        if not comment.transition(observed_status, 'APPROVED'):
+            metrics.ADMIN_ACTIONS.labels(action=action, outcome='conflict').inc()
+            return Response({"error": "Comment was modified concurrently, reload and retry"}, status=409)
         
         # Follow-up Notification
         Notification.objects.create(
             recipient=comment.author,
             message=f"Your comment on '{comment.post.title}' was approved by an admin."
         )
+        metrics.NOTIFICATIONS_CREATED.labels(kind='author').inc()
+        metrics.ADMIN_ACTIONS.labels(action=action, outcome='applied').inc()
+        stats.record(admin_approved=1, **_review_stats(flagged_at))
+
+        # A false positive must not keep flagging its near-duplicates
+        nearduplicate.forget(comment)
         return Response({"message": "Comment approved"})
 
     elif action == 'reject':
-        comment.status = 'REJECTED'
-        comment.save()
+        if not comment.transition(observed_status, 'REJECTED'):
+            metrics.ADMIN_ACTIONS.labels(action=action, outcome='conflict').inc()
+            return Response({"error": "Comment was modified concurrently, reload and retry"}, status=409)
         
         # Follow-up Notification
         Notification.objects.create(
             recipient=comment.author,
             message=f"Your comment on '{comment.post.title}' was rejected by an admin."
         )
+        metrics.NOTIFICATIONS_CREATED.labels(kind='author').inc()
+        metrics.ADMIN_ACTIONS.labels(action=action, outcome='applied').inc()
+        stats.record(admin_rejected=1, **_review_stats(flagged_at))
         
+        # Let the near-duplicate index catch variations of this comment
+        nearduplicate.remember(comment)
+        trust.revoke(comment.author_id)
+
         # Schedule Deletion
         delete_rejected_comment_task.apply_async((comment.id,), eta=timezone.now() + timezone.timedelta(days=20))
         
@@ -180,6 +398,76 @@ def admin_comment_action(request, comment_id):
 
     return Response({"error": "Invalid action"}, status=400)
 
+def _review_stats(flagged_at):
+    # Turnaround only exists for comments the admin took off the flagged queue
+    if flagged_at is None:
+        return {}
+    return {'admin_flagged_reviews': 1, 'admin_review_seconds': (timezone.now() - flagged_at).total_seconds()}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_moderation_stats(request):
+    """
+    Moderation counters and rates from the hourly rollup table.
+
+    Query params: hours (lookback window, default 24), granularity (hour|day)
+    """
+    if request.user.role != 'admin':
+        return Response({"error": "Unauthorized"}, status=403)
+
+    try:
+        hours = min(int(request.GET.get('hours', 24)), 24 * 366)
+    except ValueError:
+        return Response({"error": "hours must be an integer"}, status=400)
+    granularity = request.GET.get('granularity', 'hour')
+    if granularity not in ('hour', 'day'):
+        return Response({"error": "granularity must be 'hour' or 'day'"}, status=400)
+
+    since = timezone.now() - timezone.timedelta(hours=hours)
+    return Response(stats.summarize(since, granularity=granularity))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_export_comments(request):
+    """
+    Stream comments with statuses and category scores as NDJSON or CSV.
+
+    Query params: export_format (ndjson|csv), gzip (1), status
+    (comma-separated), created_after / created_before (ISO date or datetime).
+    `format` itself is reserved by DRF content negotiation.
+    """
+    if request.user.role != 'admin':
+        return Response({"error": "Unauthorized"}, status=403)
+
+    export_format = request.GET.get('export_format', 'ndjson')
+    if export_format not in FORMATS:
+        return Response({"error": f"export_format must be one of {', '.join(FORMATS)}"}, status=400)
+    compress = request.GET.get('gzip') == '1'
+
+    try:
+        queryset = export_queryset(
+            status=request.GET.get('status'),
+            created_after=request.GET.get('created_after'),
+            created_before=request.GET.get('created_before'),
+        )
+    except ExportFilterError as e:
+        return Response({"error": str(e)}, status=400)
+    # The queryset runs lazily while the response streams, after the replica
+    # routing middleware has returned; pick the read database now
+    queryset = queryset.using(router.db_for_read(Comment))
+
+    filename = f"comments.{export_format}" + (".gz" if compress else "")
+    content_type = 'application/gzip' if compress else (
+        'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    )
+    response = StreamingHttpResponse(
+        streaming_content(request, stream_export(queryset, export_format, compress)),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 # -------------------------
 # NOTIFICATIONS
 # -------------------------
@@ -191,7 +479,7 @@ def get_notifications(request):
     """
     Get all notifications for the authenticated user
     """
-    notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
+    notifications = Notification.objects.filter(recipient=request.user).order_by('-updated_at')
     serializer = NotificationSerializer(notifications, many=True)
     return Response(serializer.data)
 
@@ -203,7 +491,9 @@ def mark_notification_read(request, notification_id):
     """
     notification = get_object_or_404(Notification, id=notification_id, recipient=request.user)
     notification.is_read = True
-    notification.save()
+    # Leave updated_at alone so reading doesn't reorder the list; a read
+    # flagged digest is closed and the next flag starts a new one
+    notification.save(update_fields=['is_read'])
     return Response({"message": "Notification marked as read"})
 
 @api_view(['POST'])
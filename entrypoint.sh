@@ -52,10 +52,48 @@ else
     echo "✓ No pending migrations"
 fi
 
+# Reset Prometheus multiprocess samples left over from a previous run
+if [ "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Create logs directory if it doesn't exist
 mkdir -p /app/logs
 chmod 755 /app/logs
 
+# Single-container deployments (Railway) have no separate relay service, so
+# run the outbox relay next to the web server. docker-compose runs it as its
+# own service and sets OUTBOX_RELAY_EMBEDDED=0.
+# The relay is restarted when it exits. After OUTBOX_RELAY_MAX_RESTARTS quick
+# failures in a row the whole container is stopped, so the platform restarts
+# it instead of serving requests whose moderation tasks are never published.
+if [ "${OUTBOX_RELAY_EMBEDDED:-1}" = "1" ]; then
+    echo "Starting embedded outbox relay..."
+    main_pid=$$  # becomes the server's PID after `exec` below
+    max_restarts=${OUTBOX_RELAY_MAX_RESTARTS:-5}
+    (
+        failures=0
+        while true; do
+            started=$(date +%s)
+            status=0
+            python manage.py relay_outbox || status=$?
+            # A relay that ran for a while before exiting starts a new count
+            if [ $(( $(date +%s) - started )) -ge 60 ]; then
+                failures=0
+            fi
+            failures=$((failures + 1))
+            echo "Embedded outbox relay exited with status $status ($failures/$max_restarts quick failures)" >&2
+            if [ "$failures" -ge "$max_restarts" ]; then
+                echo "ERROR: Embedded outbox relay keeps failing, stopping the container" >&2
+                kill -TERM "$main_pid"
+                exit 1
+            fi
+            sleep $((failures * 2))
+        done
+    ) &
+fi
+
 echo "=== Startup Complete ==="
 echo ""
 